@@ -1,36 +1,128 @@
+import time
+# Начало выполнения модуля: отсчёт для --profile-startup
+_STARTUP_STARTED = time.perf_counter()
+_STARTUP_CPU = time.process_time()
 import os
 import sys
+import io
 import json
 import csv
-import yaml
 import configparser
-import pandas as pd
-import xml.etree.ElementTree as ET
+import importlib
+import importlib.util
 import html
 import re
 import traceback
 import threading
 import logging
-from datetime import datetime
+import hashlib
+import pickle
+import tempfile
+import shutil
+import fnmatch
+import argparse
+import atexit
+import multiprocessing
+import numbers
+import ctypes
+import ctypes.util
+import select
+import struct
+import queue
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+from concurrent.futures.process import BrokenProcessPool
+from itertools import islice, count
+from collections import OrderedDict
+from contextlib import contextmanager
+from datetime import datetime, date, timedelta, time as dt_time
 from pathlib import Path
-from tkinter import (
-    Tk, filedialog, StringVar, Text, END, messagebox, Label, Frame, Scrollbar,
-    VERTICAL, RIGHT, Y, HORIZONTAL, BOTTOM, X, Spinbox, IntVar, BooleanVar, Toplevel
-)
-from tkinter import ttk
-import tkinter.font as tkFont
-
-# Опционально попытаться импортировать drag & drop
-try:
-    from tkinterdnd2 import DND_FILES, TkinterDnD
-    DND_AVAILABLE = True
-except ImportError:
-    DND_AVAILABLE = False
-    DND_FILES = None
-    TkinterDnD = None
+
+# Этапы запуска (название, секунды по часам) в порядке выполнения, для --profile-startup
+STARTUP_STAGES = [("стандартные модули", time.perf_counter() - _STARTUP_STARTED)]
+
+# --- Ленивый импорт тяжёлых модулей ---
+_LAZY_IMPORT_LOCK = threading.Lock()
+
+class _LazyModule:
+    """Заместитель модуля: импортирует его при первом обращении к атрибуту.
+
+    После импорта глобальное имя заменяется самим модулем, так что дальше
+    обращения идут к нему напрямую. Время импорта попадает в STARTUP_STAGES.
+    """
+
+    def __init__(self, name, alias, *submodules):
+        self._name = name
+        self._alias = alias
+        self._submodules = submodules
+
+    def _load(self):
+        with _LAZY_IMPORT_LOCK:
+            module = globals()[self._alias]
+            if module is self:
+                started = time.perf_counter()
+                module = importlib.import_module(self._name)
+                for submodule in self._submodules:
+                    importlib.import_module(submodule)
+                globals()[self._alias] = module
+                STARTUP_STAGES.append((f"импорт {self._name}", time.perf_counter() - started))
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+def preload_modules():
+    """Импортирует отложенные модули заранее (например, в фоне после показа окна)."""
+    for value in list(globals().values()):
+        if isinstance(value, _LazyModule):
+            value._load()
+
+np = _LazyModule("numpy", "np")
+pd = _LazyModule("pandas", "pd")
+yaml = _LazyModule("yaml", "yaml")
+ET = _LazyModule("xml.etree.ElementTree", "ET")
+
+# tkinter и drag & drop (tkinterdnd2, опционально) загружает load_tkinter() только для GUI
+DND_AVAILABLE = False
+DND_FILES = None
+TkinterDnD = None
+
+def load_tkinter():
+    """Импортирует tkinter в глобальные имена модуля; командная строка обходится без него."""
+    global Tk, filedialog, StringVar, Text, END, messagebox, Label, Frame, Scrollbar, VERTICAL, RIGHT, Y
+    global HORIZONTAL, BOTTOM, X, Spinbox, IntVar, BooleanVar, Toplevel, Menu, ttk, tkFont
+    global DND_AVAILABLE, DND_FILES, TkinterDnD
+    if "Tk" in globals():
+        return
+    started = time.perf_counter()
+    from tkinter import (
+        Tk, filedialog, StringVar, Text, END, messagebox, Label, Frame, Scrollbar,
+        VERTICAL, RIGHT, Y, HORIZONTAL, BOTTOM, X, Spinbox, IntVar, BooleanVar, Toplevel, Menu
+    )
+    from tkinter import ttk
+    import tkinter.font as tkFont
+    try:
+        from tkinterdnd2 import DND_FILES, TkinterDnD
+        DND_AVAILABLE = True
+    except ImportError:
+        pass
+    STARTUP_STAGES.append(("импорт tkinter", time.perf_counter() - started))
+
+# Опционально: колоночные форматы Parquet/Feather/Arrow IPC; наличие проверяется без импорта
+if importlib.util.find_spec("pyarrow") is not None:
+    pa = _LazyModule("pyarrow", "pa", "pyarrow.ipc")
+    feather = _LazyModule("pyarrow.feather", "feather")
+    pq = _LazyModule("pyarrow.parquet", "pq")
+    ARROW_AVAILABLE = True
+else:
+    ARROW_AVAILABLE = False
+    pa = None
+    feather = None
+    pq = None
 
 # --- Константы ---
-SUPPORTED_FORMATS = ["csv", "xlsx", "json", "xml", "yaml", "ini", "txt", "md"]
+SUPPORTED_FORMATS = ["csv", "xlsx", "json", "jsonl", "xml", "yaml", "ini", "txt", "md"]
+# Доступны только при установленном pyarrow
+COLUMNAR_FORMATS = ["parquet", "feather", "arrow"]
 SOURCE_EXTS = [
     ".py", ".cpp", ".c", ".h", ".java", ".cs", ".js", ".ts", ".go", ".rb", ".swift",
     ".sh", ".bat", ".pl", ".php", ".rs", ".scala", ".kt", ".dart"
@@ -54,6 +146,203 @@ BTN_FG = "#ffffff"
 BTN_HOVER = "#60bbff"
 
 # --- Настройка логирования ---
+def peak_rss_mb():
+    """Пиковый RSS текущего процесса в МБ или None, если платформа его не сообщает."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux сообщает килобайты, macOS — байты
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+class OperationMetrics:
+    """Поэтапные метрики одной операции: длительности, объёмы, размеры таблицы и пик памяти."""
+
+    def __init__(self, operation, file_path):
+        self.operation = operation
+        self.file_path = str(file_path)
+        self.started = datetime.now()
+        self.stages = []
+        self.fields = {}
+
+    @contextmanager
+    def stage(self, name, **fields):
+        """Замеряет этап; поля этапа можно дополнить через возвращаемый словарь."""
+        record = {"stage": name, **fields}
+        started = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            record["peak_rss_mb"] = peak_rss_mb()
+            self.stages.append(record)
+
+    def add_stage(self, name, seconds, **fields):
+        """Добавляет этап, длительность которого измерена снаружи (например, при потоковой обработке)."""
+        self.stages.append({"stage": name, **fields, "duration_ms": round(seconds * 1000, 3),
+                            "peak_rss_mb": peak_rss_mb()})
+
+    def update(self, **fields):
+        self.fields.update(fields)
+
+    def memory_report(self):
+        """Память до/после оптимизации типов («120.5 МБ → 31.2 МБ») или пустая строка."""
+        if "memory_after" not in self.fields:
+            return ""
+        return format_memory(self.fields["memory_before"], self.fields["memory_after"])
+
+    def to_dict(self):
+        return {"timestamp": self.started.isoformat(timespec="milliseconds"),
+                "operation": self.operation, "file": self.file_path,
+                **self.fields, "stages": self.stages,
+                "total_ms": round(sum(s["duration_ms"] for s in self.stages), 3)}
+
+    def summary(self):
+        """Короткая строка для строки статуса: «parse 1.20 с · write 0.30 с»."""
+        return " · ".join(f"{s['stage']} {s['duration_ms'] / 1000:.2f} с" for s in self.stages)
+
+# --- Прогресс операций ---
+# Байт между отчётами о прогрессе чтения (и размер буфера чтения)
+PROGRESS_READ_BUFFER = 1024 * 1024
+# Строк между отчётами о прогрессе записи
+PROGRESS_BLOCK_ROWS = 10000
+# Период вывода прогресса в командной строке, с
+CLI_PROGRESS_INTERVAL = 2.0
+
+class _ProgressRaw(io.RawIOBase):
+    """Файл, сообщающий о позиции чтения: progress(прочитано_байт, размер_файла)."""
+
+    def __init__(self, path, progress):
+        super().__init__()
+        self._f = open(path, "rb", buffering=0)
+        self._total = os.fstat(self._f.fileno()).st_size
+        self._progress = progress
+        self._reported = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        return self._f.seek(offset, whence)
+
+    def tell(self):
+        return self._f.tell()
+
+    def readinto(self, buffer):
+        n = self._f.readinto(buffer)
+        position = min(self._f.tell(), self._total)
+        # Текстовые обёртки читают мелкими порциями: отчёт не чаще раза на PROGRESS_READ_BUFFER и в конце файла
+        if n and (position - self._reported >= PROGRESS_READ_BUFFER or position == self._total):
+            self._reported = position
+            self._progress(position, self._total)
+        return n
+
+    def close(self):
+        if not self.closed:
+            self._f.close()
+        super().close()
+
+def open_input(path, progress=None, encoding=None):
+    """Открывает файл для чтения (с encoding — в текстовом режиме), при progress — с отчётом о прогрессе."""
+    if not progress:
+        return open(path, "r", encoding=encoding) if encoding else open(path, "rb")
+    f = io.BufferedReader(_ProgressRaw(path, progress), PROGRESS_READ_BUFFER)
+    return io.TextIOWrapper(f, encoding=encoding) if encoding else f
+
+def format_duration(seconds):
+    seconds = int(seconds + 0.5)
+    if seconds < 60:
+        return f"{seconds} с"
+    if seconds < 3600:
+        return f"{seconds // 60} мин {seconds % 60} с"
+    return f"{seconds // 3600} ч {seconds % 3600 // 60} мин"
+
+class ProgressTracker:
+    """Прогресс операции: байты чтения, строки записи, скорость и оценка оставшегося времени.
+
+    read(done, total) — callback читателей, write(done, total) — callback писателей,
+    rows(n) — строки, выданные потоковым чтением. check() вызывается при каждом отчёте
+    (например, для отмены), on_update(tracker) — не чаще раза в interval секунд.
+    """
+
+    def __init__(self, on_update=None, interval=0.0, check=None):
+        self.on_update = on_update
+        self.interval = interval
+        self.check = check
+        self.phase = None
+        self.done = 0
+        self.total = 0
+        self.row_count = 0
+        self._phase_started = None
+        self._last_update = time.perf_counter()
+
+    def read(self, done, total):
+        self._report("read", done, total)
+
+    def write(self, done, total):
+        self._report("write", done, total)
+
+    def rows(self, count):
+        self.row_count = count
+        self._notify()
+
+    def _report(self, phase, done, total):
+        if phase != self.phase:
+            self.phase = phase
+            self._phase_started = time.perf_counter()
+        self.done, self.total = done, total
+        self._notify()
+
+    def _notify(self):
+        if self.check:
+            self.check()
+        if self.on_update:
+            now = time.perf_counter()
+            if now - self._last_update >= self.interval:
+                self._last_update = now
+                self.on_update(self)
+
+    @property
+    def fraction(self):
+        """Доля выполнения текущей фазы (0..1) или None, если объём неизвестен."""
+        return min(self.done / self.total, 1.0) if self.total else None
+
+    def rate(self):
+        elapsed = time.perf_counter() - self._phase_started if self._phase_started else 0.0
+        return self.done / elapsed if elapsed > 0 else 0.0
+
+    def eta(self):
+        """Оценка оставшегося времени текущей фазы в секундах или None."""
+        rate = self.rate()
+        if not self.total or not rate:
+            return None
+        return max(self.total - self.done, 0) / rate
+
+    def text(self):
+        """«чтение 45% (120.0 из 260.0 МБ, 35.2 МБ/с, осталось ~4 с), 450,000 строк»."""
+        parts = []
+        if self.phase == "read":
+            mb = 1024 * 1024
+            details = [f"{self.done / mb:.1f} из {self.total / mb:.1f} МБ", f"{self.rate() / mb:.1f} МБ/с"]
+        elif self.phase == "write":
+            details = [f"{self.done:,} из {self.total:,} строк", f"{self.rate():,.0f} строк/с"]
+        if self.phase:
+            eta = self.eta()
+            if eta is not None:
+                details.append(f"осталось ~{format_duration(eta)}")
+            fraction = self.fraction
+            label = "чтение" if self.phase == "read" else "запись"
+            if fraction is not None:
+                label += f" {fraction:.0%}"
+            parts.append(f"{label} ({', '.join(details)})")
+        if self.row_count:
+            parts.append(f"{self.row_count:,} строк")
+        return ", ".join(parts)
+
 class AppLogger:
     def __init__(self):
         self.setup_logging()
@@ -73,6 +362,16 @@ class AppLogger:
             ]
         )
         self.logger = logging.getLogger(__name__)
+        self.metrics_file = log_dir / f"metrics_{datetime.now().strftime('%Y%m%d')}.jsonl"
+        self._metrics_lock = threading.Lock()
+
+    def log_metrics(self, metrics):
+        """Дописывает метрики операции JSON-строкой в logs/metrics_YYYYMMDD.jsonl."""
+        record = metrics.to_dict() if isinstance(metrics, OperationMetrics) else metrics
+        line = json.dumps(record, ensure_ascii=False, default=str)
+        with self._metrics_lock:
+            with open(self.metrics_file, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
 
     def log_operation(self, operation, file_path, status="SUCCESS", error=None):
         if status == "SUCCESS":
@@ -99,7 +398,9 @@ class AppConfig:
             'window_height': '760',
             'theme': 'dark',
             'font_size': '11',
-            'preview_lines': '20'
+            'preview_lines': '20',
+            'show_metrics': 'true',
+            'max_jobs': '2'
         }
 
         self.config['PATHS'] = {
@@ -109,8 +410,39 @@ class AppConfig:
 
         self.config['PROCESSING'] = {
             'max_file_size_mb': '100',
+            'chunk_size': '50000',
             'enable_validation': 'true',
-            'show_progress': 'true'
+            'show_progress': 'true',
+            'fsync_output': 'false',
+            'xlsx_sheets': '',
+            'optimize_dtypes': 'false'
+        }
+
+        # Профиль чтения CSV: auto — определить кодировку или разделитель по началу файла
+        self.config['CSV'] = {
+            'engine': 'c',
+            'encoding': 'auto',
+            'delimiter': 'auto',
+            'usecols': '',
+            'dtype': ''
+        }
+
+        self.config['CACHE'] = {
+            'enabled': 'true',
+            'directory': 'cache',
+            'memory_budget_mb': '512',
+            'disk_budget_mb': '2048',
+            'hash_content': 'true'
+        }
+
+        # Общие параметры режима наблюдения; сами правила задаются секциями [WATCH:имя]
+        self.config['WATCH'] = {
+            'debounce_seconds': '2',
+            'poll_interval': '1',
+            'jobs': '',
+            'journal': 'watch_journal.jsonl',
+            'ignore': '.*,*.tmp,*.part,*.crdownload,*~',
+            'use_inotify': 'true'
         }
 
         self.save_config()
@@ -122,6 +454,9 @@ class AppConfig:
     def get(self, section, key, fallback=None):
         return self.config.get(section, key, fallback=fallback)
 
+    def sections(self, prefix=""):
+        return [section for section in self.config.sections() if section.startswith(prefix)]
+
     def set(self, section, key, value):
         if section not in self.config:
             self.config.add_section(section)
@@ -156,6 +491,160 @@ class DataValidator:
         except Exception:
             return False
 
+# --- Кэш результатов разбора ---
+def file_digest(filepath, block_size=1 << 20):
+    """Хэш содержимого файла (BLAKE2b), читается блоками."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(filepath, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def user_cache_dir():
+    """Каталог кэша текущего пользователя: %LOCALAPPDATA% в Windows, иначе $XDG_CACHE_HOME или ~/.cache."""
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local"
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "ffconverter"
+
+class ParseCache:
+    """Кэш разобранных файлов: LRU в памяти поверх LRU-каталога с pickle-файлами.
+
+    Ключ строится из пути, размера, mtime, (опционально) хэша содержимого,
+    формата и параметров чтения, поэтому изменённый файл никогда не попадёт в кэш.
+    Относительный directory отсчитывается от user_cache_dir(), а не от текущего каталога.
+    """
+
+    def __init__(self, directory, memory_budget_mb=512, disk_budget_mb=2048, hash_content=True):
+        self.directory = user_cache_dir() / directory
+        self.memory_budget = memory_budget_mb * 1024 * 1024
+        self.disk_budget = disk_budget_mb * 1024 * 1024
+        self.hash_content = hash_content
+        self._memory = OrderedDict()
+        self._memory_size = 0
+        self._digests = {}
+        self._lock = threading.Lock()
+        self._private = None
+
+    @classmethod
+    def from_config(cls, config):
+        """Создаёт кэш по секции [CACHE] из settings.ini или возвращает None, если он выключен."""
+        if config.get('CACHE', 'enabled', 'true') != 'true':
+            return None
+        return cls(config.get('CACHE', 'directory', 'cache'),
+                   float(config.get('CACHE', 'memory_budget_mb', '512')),
+                   float(config.get('CACHE', 'disk_budget_mb', '2048')),
+                   config.get('CACHE', 'hash_content', 'true') == 'true')
+
+    def make_key(self, filepath, ftype, options=None):
+        stat = os.stat(filepath)
+        signature = (os.path.abspath(filepath), stat.st_size, stat.st_mtime_ns)
+        digest = None
+        if self.hash_content:
+            # Хэш неизменившегося файла считается один раз за время жизни кэша
+            digest = self._digests.get(signature)
+            if digest is None:
+                digest = self._digests[signature] = file_digest(filepath)
+        parts = [*signature, digest, ftype, sorted((options or {}).items())]
+        return hashlib.sha256(json.dumps(parts, default=str).encode("utf-8")).hexdigest()
+
+    def _entry_path(self, key):
+        return self.directory / f"{key}.pkl"
+
+    def _private_directory(self):
+        """Создаёт каталог кэша с доступом только для владельца; False, если каталог доступен другим.
+
+        pickle.load выполняет код из файла, поэтому записи читаются и пишутся только в каталоге,
+        который принадлежит текущему пользователю и закрыт для записи остальным.
+        """
+        if self._private is None:
+            try:
+                self.directory.mkdir(mode=0o700, parents=True, exist_ok=True)
+                st = self.directory.stat()
+            except OSError:
+                return False
+            self._private = os.name == "nt" or (st.st_uid == os.getuid() and not st.st_mode & 0o022)
+        return self._private
+
+    def get(self, filepath, ftype, options=None):
+        """Возвращает ранее разобранные данные или None."""
+        key = self.make_key(filepath, ftype, options)
+        with self._lock:
+            if key in self._memory:
+                self._memory.move_to_end(key)
+                return self._memory[key][0]
+        if not self._private_directory():
+            return None
+
+        entry = self._entry_path(key)
+        try:
+            with open(entry, "rb") as f:
+                data = pickle.load(f)
+            os.utime(entry)  # mtime файла служит меткой последнего использования
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        self._remember(key, data, entry.stat().st_size)
+        return data
+
+    def put(self, filepath, ftype, data, options=None):
+        """Сохраняет результат разбора в памяти и на диске."""
+        key = self.make_key(filepath, ftype, options)
+        if not self._private_directory():
+            return
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            size = os.path.getsize(tmp_path)
+            os.replace(tmp_path, self._entry_path(key))
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._remember(key, data, size)
+        self._evict_disk()
+
+    def _remember(self, key, data, size):
+        if size > self.memory_budget:
+            return
+        with self._lock:
+            if key in self._memory:
+                self._memory_size -= self._memory.pop(key)[1]
+            self._memory[key] = (data, size)
+            self._memory_size += size
+            while self._memory_size > self.memory_budget:
+                _, (_, evicted_size) = self._memory.popitem(last=False)
+                self._memory_size -= evicted_size
+
+    def _evict_disk(self):
+        entries = []
+        for entry in self.directory.glob("*.pkl"):
+            try:
+                stat = entry.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry))
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry in sorted(entries, key=lambda e: e[0]):
+            if total <= self.disk_budget:
+                break
+            try:
+                entry.unlink()
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_size = 0
+        for entry in self.directory.glob("*.pkl"):
+            try:
+                entry.unlink()
+            except OSError:
+                pass
+
 # --- Вспомогательные функции для XML ---
 def xml_safe_tag(tag):
     tag = re.sub(r'[^a-zA-Z0-9_\.]', '_', str(tag).strip())
@@ -164,9 +653,59 @@ def xml_safe_tag(tag):
 def xml_safe_text(val):
     return html.escape(str(val), quote=True)
 
+# Строк в одном блоке при записи XML
+XML_BLOCK_ROWS = 10000
+# Строк JSON Lines, сериализуемых за один вызов to_json
+JSONL_BATCH_ROWS = 10000
+# Секций INI в одном блоке записи
+INI_BLOCK_ROWS = 10000
+
+# xml_safe_text() + экранирование ElementTree при сериализации за один проход str.translate
+_XML_TEXT_ESCAPE = str.maketrans({
+    "&": "&amp;amp;", "<": "&amp;lt;", ">": "&amp;gt;", '"': "&amp;quot;", "'": "&amp;#x27;"
+})
+
+def _xml_column_cells(values, j):
+    """Значения столбца в том же виде, в каком их отдаёт DataFrame.iterrows()."""
+    column = values[:, j]
+    if values.dtype.kind in "mM":
+        return pd.Series(column).tolist()
+    return column.tolist()
+
+def _is_text_or_missing(val):
+    return isinstance(val, str) or val is None or (isinstance(val, float) and val != val)
+
+def _iterrows_text_rows(cells):
+    """Повторяет вывод типов iterrows() в pandas 3: в строке только из текста None становится NaN."""
+    if not getattr(pd.options.future, "infer_string", False) or not any(None in col for col in cells):
+        return cells
+    rows = []
+    for row in zip(*cells):
+        if None in row and any(isinstance(v, str) for v in row) and all(map(_is_text_or_missing, row)):
+            row = tuple(float("nan") if v is None else v for v in row)
+        rows.append(row)
+    return [list(col) for col in zip(*rows)]
+
+def _render_xml_records(df, tags):
+    """Сериализует блок строк в последовательность <record>...</record> по столбцам."""
+    if not tags:
+        return "<record />" * len(df)
+    values = df.to_numpy()
+    cells = [_xml_column_cells(values, j) for j in range(len(tags))]
+    if values.dtype == object:
+        cells = _iterrows_text_rows(cells)
+    columns = []
+    for tag, column in zip(tags, cells):
+        opened, closed, empty = f"<{tag}>", f"</{tag}>", f"<{tag} />"
+        escaped = [str(v).translate(_XML_TEXT_ESCAPE) for v in column]
+        columns.append([opened + text + closed if text else empty for text in escaped])
+    return "".join("<record>" + "".join(parts) + "</record>" for parts in zip(*columns))
+
 # --- Логика обработки данных ---
 def _normalize_data_to_df(data):
     """Преобразует словари или списки в DataFrame."""
+    if isinstance(data, TextLines):
+        data = list(data)
     if isinstance(data, list):
         return pd.DataFrame(data)
     if isinstance(data, dict):
@@ -176,146 +715,2016 @@ def _normalize_data_to_df(data):
             return data
     return data
 
-def _read_csv(path):
-    return pd.read_csv(path)
-
-def _read_xlsx(path):
-    return pd.read_excel(path)
-
-def _read_json(path):
-    with open(path, "r", encoding="utf-8") as f:
+# --- Профиль чтения CSV ---
+CSV_ENGINES = ("c", "pyarrow", "python")
+# Профиль по умолчанию: движок C, кодировка и разделитель определяются по началу файла
+CSV_DEFAULTS = {"engine": "c", "encoding": "auto", "delimiter": "auto", "usecols": None, "dtype": None}
+# Разделители, которые неудобно записывать в settings.ini и командной строке
+CSV_DELIMITER_NAMES = {"tab": "\t", "\\t": "\t", "comma": ",", "semicolon": ";", "pipe": "|"}
+# Кодек без суффикса порядка байтов сам снимает BOM, иначе он попал бы в имя первого столбца
+_CSV_BOM_CODECS = {"utf-16-le": "utf-16", "utf-16-be": "utf-16", "utf-32-le": "utf-32", "utf-32-be": "utf-32"}
+
+def parse_column_list(value):
+    """Список столбцов из строки "a,b,c"; пустая строка означает все столбцы."""
+    columns = [name.strip() for name in (value or "").split(",") if name.strip()]
+    return columns or None
+
+def parse_dtype_map(value):
+    """Типы столбцов из строки "id:int64,name:str" для pd.read_csv(dtype=...)."""
+    dtypes = {}
+    for item in (value or "").split(","):
+        if not item.strip():
+            continue
+        name, sep, dtype = item.rpartition(":")
+        if not sep or not name.strip() or not dtype.strip():
+            raise ValueError(f"Ожидается столбец:тип, получено: {item.strip()}")
+        dtypes[name.strip()] = dtype.strip()
+    return dtypes or None
+
+def build_csv_profile(engine=None, encoding=None, delimiter=None, usecols=None, dtype=None):
+    """Проверенный профиль чтения CSV; незаданные параметры берутся из CSV_DEFAULTS."""
+    profile = dict(CSV_DEFAULTS)
+    given = {"engine": engine, "encoding": encoding, "delimiter": delimiter, "usecols": usecols, "dtype": dtype}
+    profile.update({key: value for key, value in given.items() if value})
+    if profile["engine"] not in CSV_ENGINES:
+        raise ValueError(f"Неизвестный движок CSV: {profile['engine']} (допустимы: {', '.join(CSV_ENGINES)})")
+    if profile["engine"] == "pyarrow" and not ARROW_AVAILABLE:
+        raise ValueError("Для движка CSV pyarrow требуется pyarrow: pip install pyarrow")
+    profile["delimiter"] = CSV_DELIMITER_NAMES.get(profile["delimiter"], profile["delimiter"])
+    return profile
+
+def csv_profile_from_config(config, **overrides):
+    """Профиль из секции [CSV] settings.ini; заданные overrides (например, из CLI) важнее."""
+    settings = {
+        "engine": config.get('CSV', 'engine', 'c'),
+        "encoding": config.get('CSV', 'encoding', 'auto'),
+        "delimiter": config.get('CSV', 'delimiter', 'auto'),
+        "usecols": parse_column_list(config.get('CSV', 'usecols', '')),
+        "dtype": parse_dtype_map(config.get('CSV', 'dtype', '')),
+    }
+    settings.update({key: value for key, value in overrides.items() if value is not None})
+    return build_csv_profile(**settings)
+
+def sniff_csv_dialect(path):
+    """Кодировка и разделитель CSV по первым SNIFF_BYTES байтам (разделитель "," если не определился)."""
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+        complete = not f.read(1)
+    encoding, text = _decode_head(head)
+    _, delimiter = _sniff_csv(_significant_lines(text, complete, comments=""))
+    return _CSV_BOM_CODECS.get(encoding, encoding), delimiter or ","
+
+def _csv_kwargs(path, profile, chunked=False, columns=None):
+    """Аргументы pd.read_csv по профилю; "auto" кодировка и разделитель определяются один раз на чтение.
+
+    Движок pyarrow не умеет читать по частям (chunksize, nrows), поэтому для них берётся C.
+    columns сужает чтение до этих столбцов; отсутствующие в файле пропускаются.
+    """
+    profile = profile or CSV_DEFAULTS
+    encoding, delimiter = profile["encoding"], profile["delimiter"]
+    if encoding == "auto" or delimiter == "auto":
+        sniffed_encoding, sniffed_delimiter = sniff_csv_dialect(path)
+        encoding = sniffed_encoding if encoding == "auto" else encoding
+        delimiter = sniffed_delimiter if delimiter == "auto" else delimiter
+    engine = profile["engine"]
+    kwargs = {"sep": delimiter, "encoding": encoding,
+              "engine": "c" if chunked and engine == "pyarrow" else engine}
+    usecols = profile["usecols"]
+    if columns:
+        # Пересечение с заголовком: pyarrow не принимает отсутствующие столбцы, а при пустом
+        # пересечении читаются все, чтобы ошибка выборки перечислила столбцы файла
+        header = usecols or pd.read_csv(path, nrows=0, sep=delimiter, encoding=encoding).columns
+        wanted = set(columns)
+        usecols = [name for name in header if name in wanted] or usecols
+    if usecols:
+        kwargs["usecols"] = usecols
+    if profile["dtype"]:
+        kwargs["dtype"] = profile["dtype"]
+    return kwargs
+
+def _csv_encoding_retry(csv_profile, kwargs):
+    """Кодировка для повторного чтения после UnicodeDecodeError или None.
+
+    Начало файла может оказаться чистым ASCII, а дальше идти не UTF-8: тогда, если
+    кодировку определяли автоматически, берётся следующая кандидатка _decode_head.
+    """
+    if (csv_profile or CSV_DEFAULTS)["encoding"] == "auto" and kwargs["encoding"] == "utf-8":
+        return "cp1251"
+    return None
+
+def _has_undecoded_bytes(df):
+    """Есть ли ячейки bytes: так pyarrow возвращает строки, не декодирующиеся в заданной кодировке."""
+    return any(df.iloc[:, i].dtype == object and df.iloc[:, i].map(type).eq(bytes).any()
+               for i in range(df.shape[1]))
+
+def _read_csv(path, progress=None, csv_profile=None, columns=None):
+    kwargs = _csv_kwargs(path, csv_profile, columns=columns)
+    retry = _csv_encoding_retry(csv_profile, kwargs)
+    try:
+        with open_input(path, progress) as f:
+            df = pd.read_csv(f, **kwargs)
+        # pyarrow не выбрасывает UnicodeDecodeError, а оставляет недекодируемые строки как bytes
+        if kwargs["engine"] != "pyarrow" or not _has_undecoded_bytes(df):
+            return df
+        if not retry:
+            raise ValueError(f"Файл CSV не декодируется в кодировке {kwargs['encoding']}: "
+                             f"укажите кодировку в профиле CSV")
+    except UnicodeDecodeError:
+        if not retry:
+            raise
+    # Повторное чтение идёт через движок C, который сообщает об ошибках декодирования
+    kwargs.update(encoding=retry, engine="c")
+    with open_input(path, progress) as f:
+        return pd.read_csv(f, **kwargs)
+
+# Листы меньших книг читаются последовательно: запуск процессов обходится дороже
+XLSX_PARALLEL_MIN_BYTES = 1024 * 1024
+# Оформление заголовка, как у to_excel в pandas < 3 (применяется только с такими версиями pandas)
+XLSX_HEADER_STYLE = {"bold": True, "border": "thin", "horizontal": "center", "vertical": "top"}
+_XLSX_ERROR_CODES = frozenset(("#NULL!", "#DIV/0!", "#VALUE!", "#REF!", "#NAME?", "#NUM!", "#N/A"))
+_XLSX_CELL_TYPES = (str, numbers.Number, date, dt_time, timedelta)
+
+# Выбор всех листов книги; "*" не может входить в имя листа Excel
+ALL_SHEETS = "*"
+
+def parse_sheet_list(value):
+    """Список листов из строки "Лист1,Лист2"; "*" — все листы, пустая строка — только первый (None)."""
+    if not value or not value.strip():
+        return None
+    if value.strip() == ALL_SHEETS:
+        return [ALL_SHEETS]
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+def is_workbook(data):
+    """Книга из нескольких листов представлена словарём {имя листа: DataFrame}."""
+    return isinstance(data, dict) and bool(data) and all(isinstance(v, pd.DataFrame) for v in data.values())
+
+def combine_sheets(book):
+    """Сводит листы книги в одну таблицу с первым столбцом "sheet" для форматов без листов."""
+    column = "sheet"
+    while any(column in df.columns for df in book.values()):
+        column = "_" + column
+    frames = [df.assign(**{column: name}) for name, df in book.items()]
+    combined = pd.concat(frames, ignore_index=True)
+    return combined[[column] + [c for c in combined.columns if c != column]]
+
+def frame_shape(data):
+    """(строк, столбцов) для DataFrame или книги из нескольких листов."""
+    if is_workbook(data):
+        return sum(len(df) for df in data.values()), max(len(df.columns) for df in data.values())
+    return len(data), len(data.columns)
+
+def _xlsx_cell(value):
+    # Те же преобразования, что и у pd.read_excel с openpyxl: пустые ячейки — "",
+    # целые числа с плавающей точкой — int, ошибки формул — NaN
+    if value is None:
+        return ""
+    if type(value) is float and value.is_integer():
+        return int(value)
+    if type(value) is str and value in _XLSX_ERROR_CODES:
+        return float("nan")
+    return value
+
+def _xlsx_projection(header, columns):
+    """Индексы ячеек нужных столбцов по строке заголовка или None, если читать нужно все.
+
+    Ячейки выбираются заранее, только когда все заголовки — непустые неповторяющиеся строки:
+    иначе pandas переименовал бы столбцы ("Unnamed: 2", "a.1") и имена не совпали бы.
+    """
+    names = list(header)
+    while names and names[-1] in (None, ""):
+        names.pop()
+    if (not all(type(name) is str and name for name in names) or len(set(names)) != len(names)
+            or any(column.startswith("Unnamed: ") for column in columns)):
+        return None
+    wanted = set(columns)
+    keep = [i for i, name in enumerate(names) if name in wanted]
+    return keep or None
+
+def _read_xlsx_sheet(path, sheet_name, progress=None, columns=None, limit=None):
+    """Читает один лист в режиме read-only, не создавая объектов ячеек.
+
+    columns — столбцы, значения которых нужно разобрать (остальные пропускаются);
+    limit — сколько строк данных прочитать.
+    """
+    from openpyxl import load_workbook
+    source = open_input(path, progress) if progress else path
+    wb = load_workbook(source, read_only=True, data_only=True, keep_links=False)
+    try:
+        ws = wb[sheet_name]
+        ws.reset_dimensions()
+        data, last_row, keep = [], -1, None
+        for row in ws.iter_rows(values_only=True):
+            if not data and columns:
+                keep = _xlsx_projection(row, columns)
+            if keep is None:
+                converted = [_xlsx_cell(v) for v in row]
+                while converted and converted[-1] == "":
+                    converted.pop()
+                filled = bool(converted)
+            else:
+                # Пустота строки определяется по всем ячейкам, как и при чтении без выборки
+                converted = [_xlsx_cell(row[i]) if i < len(row) else "" for i in keep]
+                while converted and converted[-1] == "":
+                    converted.pop()
+                filled = any(v is not None and v != "" for v in row)
+            if filled:
+                last_row = len(data)
+            data.append(converted)
+            # Строки 1..limit окончательны, когда за ними (или последней из них) есть непустая строка
+            if limit is not None and last_row >= limit:
+                break
+    finally:
+        wb.close()
+        if progress:
+            source.close()
+    data = data[:last_row + 1]
+    if limit is not None:
+        data = data[:limit + 1]
+    if not data:
+        return pd.DataFrame()
+    width = max(len(row) for row in data)
+    data = [row + [""] * (width - len(row)) for row in data]
+    from pandas.io.parsers import TextParser
+    with TextParser(data, header=0, skip_blank_lines=False) as parser:
+        return parser.read()
+
+def xlsx_sheet_names(path):
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, keep_links=False)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+def _read_xlsx(path, sheets=None, progress=None, columns=None, limit=None):
+    """Читает первый лист, выбранные или все (["*"]) листы; один лист — DataFrame, несколько — книга.
+
+    Листы больших книг разбираются параллельно в отдельных процессах, если чтение
+    не выполняется уже внутри рабочего процесса пакетной конвертации.
+    """
+    names = xlsx_sheet_names(path)
+    if not sheets:
+        # Как и pd.read_excel: без явного выбора читается первый лист, а книга из
+        # нескольких листов (и сведение листов для форматов без листов) — только по запросу
+        names = names[:1]
+    elif ALL_SHEETS not in sheets:
+        missing = [name for name in sheets if name not in names]
+        if missing:
+            raise ValueError(f"Листы не найдены: {', '.join(missing)}; в книге: {', '.join(names)}")
+        names = list(sheets)
+    if len(names) == 1:
+        return _read_xlsx_sheet(path, names[0], progress, columns, limit)
+    workers = min(len(names), os.cpu_count() or 1)
+    size = os.path.getsize(path)
+    parallel = (workers > 1 and size >= XLSX_PARALLEL_MIN_BYTES
+                and multiprocessing.parent_process() is None)
+
+    def read_sheets():
+        if not parallel:
+            for name in names:
+                yield _read_xlsx_sheet(path, name, None, columns, limit)
+            return
+        n = len(names)
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            yield from pool.map(_read_xlsx_sheet, [path] * n, names, [None] * n, [columns] * n, [limit] * n)
+
+    frames = []
+    for frame in read_sheets():
+        frames.append(frame)
+        # Прогресс по листам: доля прочитанных листов от размера файла
+        if progress:
+            progress(size * len(frames) // len(names), size)
+    return dict(zip(names, frames))
+
+def _read_json(path, progress=None):
+    with open_input(path, progress, "utf-8") as f:
         data = json.load(f)
     return _normalize_data_to_df(data)
 
-def _read_xml(path):
-    try:
-        return pd.read_xml(path, parser='etree')
-    except (ValueError, ET.ParseError):
-        tree = ET.parse(path)
-        root = tree.getroot()
-        records = [
-            {element.tag: element.text for element in child}
-            for child in root if list(child)
-        ]
-        if records:
-            return pd.DataFrame(records)
-        return {elem.tag: elem.text for elem in root}
-
-def _read_yaml(path):
+def _xml_local_name(tag):
+    return tag.split("}")[1] if "}" in tag else tag
+
+def _xml_record(elem):
+    """Строка таблицы из элемента-записи по тем же правилам, что и pd.read_xml."""
+    record = {_xml_local_name(k): v for k, v in elem.attrib.items()}
+    if elem.text and not elem.text.isspace():
+        record[_xml_local_name(elem.tag)] = elem.text
+    for child in elem:
+        record[_xml_local_name(child.tag)] = child.text if child.text else None
+    return record
+
+def _xml_rows_to_df(rows, columns):
+    """Собирает DataFrame из строковых значений с выводом типов, как у pd.read_xml."""
+    width = len(columns)
+    rows = [row + [None] * (width - len(row)) for row in rows]
+    from pandas.io.parsers import TextParser
+    with TextParser(rows, names=list(columns)) as parser:
+        return parser.read()
+
+def _iter_xml_rows(path, batch_size, progress=None):
+    """Потоковый разбор XML через iterparse.
+
+    Записями считаются дочерние элементы корня; обработанные элементы сразу удаляются
+    из дерева, так что в памяти не держится весь документ. Возвращает пары
+    (строки, столбцы) пачками по batch_size, а если ни у одной записи нет вложенных
+    элементов или атрибутов — словарь {тег: текст}, как и прежний _read_xml.
+    """
+    total = os.path.getsize(path)
+    columns = {}
+    rows = []
+    leaves = {}
+    has_records = False
+    depth = 0
+    root = None
+    with open(path, "rb") as f:
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                if root is None:
+                    root = elem
+                continue
+            depth -= 1
+            if depth != 1:
+                continue
+            record = _xml_record(elem)
+            if len(elem) or elem.attrib:
+                has_records = True
+            elif not has_records:
+                leaves[elem.tag] = elem.text
+            for key in record:
+                columns.setdefault(key, len(columns))
+            row = [None] * len(columns)
+            for key, value in record.items():
+                row[columns[key]] = value
+            rows.append(row)
+            root.clear()
+            if has_records and len(rows) >= batch_size:
+                if progress:
+                    progress(f.tell(), total)
+                yield rows, columns
+                rows = []
+        if progress:
+            progress(total, total)
+    if not has_records:
+        yield leaves, None
+    elif rows:
+        yield rows, columns
+
+def _iter_xml(path, chunksize, progress=None):
+    for rows, columns in _iter_xml_rows(path, chunksize, progress):
+        if columns is None:
+            yield ensure_dataframe(rows)
+        else:
+            yield _xml_rows_to_df(rows, columns)
+
+def _read_xml(path, progress=None):
+    # Строки копятся в компактном виде, а типы выводятся один раз по всему столбцу
+    all_rows, columns = [], None
+    for rows, columns in _iter_xml_rows(path, 50000, progress):
+        if columns is None:
+            return rows
+        all_rows.extend(rows)
+    return _xml_rows_to_df(all_rows, columns or {})
+
+JSON_ARRAY_DELIMITERS = ", \t\r\n]"
+
+def _iter_json_array(path, buffer_size=1 << 16, progress=None):
+    """Инкрементально разбирает JSON-массив верхнего уровня, возвращая элементы по одному."""
+    decoder = json.JSONDecoder()
+    with open_input(path, progress, "utf-8") as f:
+        buf, pos, eof = "", 0, False
+
+        def fill():
+            nonlocal buf, pos, eof
+            data = f.read(buffer_size)
+            eof = not data
+            buf = buf[pos:] + data
+            pos = 0
+
+        def skip(chars):
+            nonlocal pos
+            while True:
+                while pos < len(buf) and buf[pos] in chars:
+                    pos += 1
+                if pos < len(buf) or eof:
+                    return
+                fill()
+
+        fill()
+        skip(" \t\r\n\ufeff")
+        if buf[pos:pos + 1] != "[":
+            raise ValueError("Документ не является JSON-массивом")
+        pos += 1
+        while True:
+            skip(" \t\r\n,")
+            if pos >= len(buf):
+                raise ValueError("Неожиданный конец JSON-массива")
+            if buf[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buf, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                fill()
+                continue
+            # Число на границе буфера может быть обрезано ("1." или "1.5e" разбираются
+            # как более короткое число), поэтому до конца файла элемент принимается,
+            # только если за ним в буфере уже виден разделитель
+            if not eof and (end >= len(buf) or buf[end] not in JSON_ARRAY_DELIMITERS):
+                fill()
+                continue
+            pos = end
+            yield item
+
+def _json_is_array(path):
+    """Начинается ли JSON-документ с массива (проверяется первый непробельный символ)."""
     with open(path, "r", encoding="utf-8") as f:
-        data = yaml.safe_load(f)
-    return _normalize_data_to_df(data)
+        while True:
+            data = f.read(4096)
+            if not data:
+                return False
+            data = data.lstrip(" \t\r\n\ufeff")
+            if data:
+                return data[0] == "["
+
+def _iter_json(path, chunksize, progress=None):
+    """Чанки JSON-массива в памяти ограниченного размера; прочие документы читаются целиком."""
+    if not _json_is_array(path):
+        yield from _slice_chunks(ensure_dataframe(_read_json(path, progress)), chunksize)
+        return
+    items = _iter_json_array(path, progress=progress)
+    yield from _align_columns(_normalize_data_to_df(batch) for batch in _batched(items, chunksize))
+
+def _iter_jsonl_records(path, progress=None):
+    with open_input(path, progress, "utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Ошибка JSON в строке {line_no}: {e}") from e
+
+def _read_jsonl(path, progress=None):
+    return _normalize_data_to_df(list(_iter_jsonl_records(path, progress)))
+
+def _iter_jsonl(path, chunksize, progress=None):
+    records = _iter_jsonl_records(path, progress)
+    yield from _align_columns(_normalize_data_to_df(batch) for batch in _batched(records, chunksize))
+
+def _batched(items, size):
+    items = iter(items)
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+def _align_columns(frames):
+    """Выравнивает чанки записей по объединению уже встреченных ключей.
+
+    Ключи, появившиеся позже, добавляются в конец, а отсутствующие в чанке заполняются NaN,
+    чтобы писатели с общим заголовком (CSV) получали согласованные столбцы.
+    """
+    columns = None
+    for df in frames:
+        if columns is None:
+            columns = df.columns
+        elif not df.columns.equals(columns):
+            new = df.columns.difference(columns, sort=False)
+            if len(new):
+                columns = columns.append(new)
+            df = df.reindex(columns=columns)
+        yield df
+
+# Сборки PyYAML с libyaml дают C-реализации safe-загрузчика и дампера, в разы быстрее чистого Python
+def _yaml_loader():
+    return getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+def _yaml_dumper():
+    return getattr(yaml, "CSafeDumper", yaml.SafeDumper)
+
+# Строк в одном вызове дампера: записи не собираются в один список на весь файл
+YAML_BLOCK_ROWS = 10000
+
+def _yaml_documents(path, progress=None):
+    """Документы YAML-потока (разделённые ---) по одному, без загрузки всего потока."""
+    with open_input(path, progress, "utf-8") as f:
+        yield from yaml.load_all(f, Loader=_yaml_loader())
+
+def _yaml_records(documents):
+    """Записи из документов: списки разворачиваются, пустые документы пропускаются."""
+    for doc in documents:
+        if isinstance(doc, list):
+            yield from doc
+        elif doc is not None:
+            yield doc
+
+def _read_yaml(path, progress=None):
+    documents = list(_yaml_documents(path, progress))
+    if len(documents) == 1:
+        # Один документ: словарь — одна запись, список — таблица
+        return _normalize_data_to_df(documents[0])
+    return _normalize_data_to_df(list(_yaml_records(documents)))
+
+def _iter_yaml(path, chunksize, progress=None):
+    """Чанки YAML: документы разбираются по одному, записи группируются по chunksize."""
+    records = _yaml_records(_yaml_documents(path, progress))
+    yield from _align_columns(_normalize_data_to_df(batch) for batch in _batched(records, chunksize))
+
+def _parse_ini_lines(lines):
+    """Построчный разбор INI в {секция: {ключ: значение}} с семантикой ConfigParser по умолчанию.
+
+    Возвращает None, если встречено то, что требует полного ConfigParser:
+    секция DEFAULT, интерполяция %(...)s, дубликаты, ошибки синтаксиса, пустые строки внутри значений.
+    """
+    data = {}
+    section = key = None
+    gap = False
+    for line in lines:
+        stripped = line.strip()
+        if not stripped:
+            gap = True
+            continue
+        if stripped[0] in "#;":
+            continue
+        if line[0] in " \t":
+            # Строка продолжения многострочного значения
+            value = _ini_unescape(stripped)
+            if key is None or gap or value is None:
+                return None
+            section[key] += "\n" + value
+            continue
+        gap = False
+        if stripped[0] == "[":
+            name = stripped[1:-1]
+            if stripped[-1] != "]" or not name or name == "DEFAULT" or name in data:
+                return None
+            section = data[name] = {}
+            key = None
+            continue
+        delimiters = [i for i in (stripped.find("="), stripped.find(":")) if i >= 0]
+        if section is None or not delimiters:
+            return None
+        pos = min(delimiters)
+        key = stripped[:pos].rstrip().lower()
+        value = _ini_unescape(stripped[pos + 1:].lstrip())
+        if not key or key in section or value is None:
+            return None
+        section[key] = value
+    return data
 
-def _read_ini(path):
-    cp = configparser.ConfigParser()
-    cp.read(path, encoding="utf-8")
-    data = {section: dict(cp[section]) for section in cp.sections()}
-    return pd.DataFrame(data).transpose()
+def _ini_unescape(value):
+    """%% -> %, как при чтении через ConfigParser; None — если нужна интерполяция (или это ошибка)."""
+    if "%" not in value:
+        return value
+    if "%" in value.replace("%%", ""):
+        return None
+    return value.replace("%%", "%")
+
+def _read_ini(path, progress=None):
+    with open_input(path, progress, "utf-8") as f:
+        data = _parse_ini_lines(f)
+    if data is None:
+        cp = configparser.ConfigParser()
+        cp.read(path, encoding="utf-8")
+        data = {section: dict(cp[section]) for section in cp.sections()}
+    if not data or not all(data.values()):
+        return pd.DataFrame(data).transpose()
+    # Построчное построение вместо транспонирования: тот же результат на порядки быстрее
+    return pd.DataFrame(list(data.values()), index=list(data))
+
+# Размер блока файла, в котором за один проход numpy ищутся переводы строк
+TEXT_INDEX_BLOCK = 16 * 1024 * 1024
+
+class TextLines:
+    """Строки текстового файла по индексу начал строк: в памяти только индекс (8 байт на строку).
+
+    Ведёт себя как список строк (len, индексы, срезы, итерация), но читает и декодирует строки
+    только по запросу. Файл не держится открытым: каждое чтение открывает его заново и сверяет
+    размер и mtime с проиндексированными, поэтому усечённый после открытия файл (ротация логов,
+    перезапись редактором) даёт OSError, а не падение процесса, и файл не блокируется в Windows.
+    При сериализации (в кэш разбора) сохраняются путь, подпись файла и индекс, поэтому
+    повторное открытие файла не перестраивает индекс.
+    """
+
+    def __init__(self, path, progress=None):
+        self.path = path
+        with open(path, "rb") as f:
+            self._signature = self._stat(f)
+            self._offsets = self._build_index(f, progress)
+            if self._stat(f) != self._signature or self._offsets[-1] != self._signature[0]:
+                raise OSError(f"Файл изменился во время чтения: {path}")
 
-def _read_text_based(path):
-    with open(path, "r", encoding="utf-8") as f:
-        return f.readlines()
+    @staticmethod
+    def _stat(f):
+        stat = os.fstat(f.fileno())
+        return stat.st_size, stat.st_mtime_ns
+
+    def _open(self):
+        """Открывает файл, проверив, что он не изменился с момента построения индекса."""
+        f = open(self.path, "rb")
+        if self._stat(f) != self._signature:
+            f.close()
+            raise OSError(f"Файл изменился после открытия, откройте его заново: {self.path}")
+        return f
+
+    def _build_index(self, f, progress):
+        size = self._signature[0]
+        parts = [np.zeros(1, dtype=np.int64)]
+        block = bytearray(TEXT_INDEX_BLOCK)
+        done = 0
+        while True:
+            n = f.readinto(block)
+            if not n:
+                break
+            parts.append(np.flatnonzero(np.frombuffer(block, dtype=np.uint8, count=n) == 10).astype(np.int64)
+                         + (done + 1))
+            done += n
+            if progress:
+                progress(min(done, size), size)
+        offsets = np.concatenate(parts)
+        # Последняя строка без перевода строки тоже считается строкой
+        if offsets[-1] != done:
+            offsets = np.append(offsets, done)
+        return offsets
+
+    def __getstate__(self):
+        return {"path": self.path, "signature": self._signature, "offsets": self._offsets}
+
+    def __setstate__(self, state):
+        self.path = state["path"]
+        self._signature = tuple(state["signature"])
+        self._offsets = state["offsets"]
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def lines(self, start, stop):
+        """Строки [start, stop) с переводами строк, как у readlines()."""
+        offsets = self._offsets[start:stop + 1].tolist()
+        if len(offsets) < 2:
+            return []
+        base = offsets[0]
+        with self._open() as f:
+            f.seek(base)
+            data = f.read(offsets[-1] - base)
+        if len(data) != offsets[-1] - base:
+            raise OSError(f"Файл изменился после открытия, откройте его заново: {self.path}")
+        return [data[a - base:b - base].decode("utf-8", errors="replace").replace("\r\n", "\n")
+                for a, b in zip(offsets, offsets[1:])]
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            return self.lines(start, stop) if step == 1 else [self[i] for i in range(start, stop, step)]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("номер строки вне файла")
+        return self.lines(index, index + 1)[0]
+
+    def __iter__(self):
+        for start in range(0, len(self), PROGRESS_BLOCK_ROWS):
+            yield from self.lines(start, start + PROGRESS_BLOCK_ROWS)
+
+    def copy_to(self, out_path):
+        """Записывает байты файла как есть, без декодирования строк."""
+        if os.path.exists(out_path) and os.path.samefile(self.path, out_path):
+            return  # перезапись файла самим собой обрезала бы его
+        with self._open() as src, open(out_path, "wb") as dst:
+            shutil.copyfileobj(src, dst, TEXT_INDEX_BLOCK)
+            copied = dst.tell()
+        if copied != self._signature[0]:
+            raise OSError(f"Файл изменился во время копирования: {self.path}")
+
+def _read_text_based(path, progress=None):
+    return TextLines(path, progress)
 
 READERS = {
-    "csv": _read_csv, "xlsx": _read_xlsx, "json": _read_json,
+    "csv": _read_csv, "xlsx": _read_xlsx, "json": _read_json, "jsonl": _read_jsonl,
     "xml": _read_xml, "yaml": _read_yaml, "ini": _read_ini,
     "txt": _read_text_based, "md": _read_text_based, "code": _read_text_based
 }
 
-def _write_csv(df, path):
-    df.to_csv(path, index=False)
+# Текстовые форматы читаются в TextLines: в памяти только индекс строк, а не список строк
+TEXT_FORMATS = {"txt", "md", "code"}
 
-def _write_xlsx(df, path):
-    df.to_excel(path, index=False)
+# Быстрый предпросмотр: читают только первые n строк/записей файла
+def _preview_csv(path, n, csv_profile=None):
+    return pd.read_csv(path, nrows=n, **_csv_kwargs(path, csv_profile, chunked=True))
 
-def _write_json(df, path):
-    df.to_json(path, orient="records", force_ascii=False, indent=2)
+def _preview_xlsx(path, n):
+    from openpyxl import load_workbook
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        rows = list(wb.worksheets[0].iter_rows(max_row=n + 1, values_only=True))
+    finally:
+        wb.close()
+    if not rows:
+        return pd.DataFrame()
+    header = [col if col is not None else f"Unnamed: {i}" for i, col in enumerate(rows[0])]
+    return pd.DataFrame(rows[1:], columns=header)
+
+# Документ JSON, не являющийся массивом, по частям не разбирается: больше этого размера
+# для предпросмотра показывается его начало как текст, а не весь файл
+JSON_PREVIEW_BYTES = 1024 * 1024
+
+def _preview_json(path, n):
+    if _json_is_array(path):
+        return _normalize_data_to_df(list(islice(_iter_json_array(path), n)))
+    if os.path.getsize(path) <= JSON_PREVIEW_BYTES:
+        return _read_json(path)
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        head = f.read(JSON_PREVIEW_BYTES)
+    return head.splitlines(keepends=True)[:n]
+
+def _preview_jsonl(path, n):
+    return _normalize_data_to_df(list(islice(_iter_jsonl_records(path), n)))
+
+def _preview_xml(path, n):
+    chunks = _iter_xml(path, n)
+    try:
+        return next(chunks, pd.DataFrame())
+    finally:
+        chunks.close()
 
-def _write_xml(df, path):
-    root = ET.Element("records")
-    for _, row in df.iterrows():
-        item = ET.SubElement(root, "record")
-        for col, val in row.items():
-            tag = xml_safe_tag(col)
-            sub = ET.SubElement(item, tag)
-            sub.text = xml_safe_text(val)
-    tree = ET.ElementTree(root)
-    tree.write(path, encoding="utf-8", xml_declaration=True)
+def _preview_yaml(path, n):
+    documents = _yaml_documents(path)
+    try:
+        return _normalize_data_to_df(list(islice(_yaml_records(documents), n)))
+    finally:
+        documents.close()
 
-def _write_yaml(df, path):
-    df_records = df.to_dict(orient="records")
-    with open(path, "w", encoding="utf-8") as f:
-        yaml.safe_dump(df_records, f, allow_unicode=True)
+def _preview_text_based(path, n):
+    with open(path, "r", encoding="utf-8") as f:
+        return list(islice(f, n))
 
-def _write_ini(df, path):
-    cp = configparser.ConfigParser()
+PREVIEW_READERS = {
+    "csv": _preview_csv, "xlsx": _preview_xlsx, "json": _preview_json, "jsonl": _preview_jsonl,
+    "xml": _preview_xml, "yaml": _preview_yaml,
+    "txt": _preview_text_based, "md": _preview_text_based, "code": _preview_text_based
+}
+
+# Потоковые читатели: возвращают итератор DataFrame-чанков фиксированного размера
+def _iter_csv(path, chunksize, progress=None, csv_profile=None, columns=None):
+    kwargs = _csv_kwargs(path, csv_profile, chunked=True, columns=columns)
+    started = False
+    try:
+        with open_input(path, progress) as f, pd.read_csv(f, chunksize=chunksize, **kwargs) as reader:
+            for chunk in reader:
+                started = True
+                yield chunk
+    except UnicodeDecodeError:
+        # Отданные чанки уже записаны: перечитать в другой кодировке можно, только пока их не было
+        kwargs["encoding"] = None if started else _csv_encoding_retry(csv_profile, kwargs)
+        if not kwargs["encoding"]:
+            raise
+        with open_input(path, progress) as f, pd.read_csv(f, chunksize=chunksize, **kwargs) as reader:
+            yield from reader
+
+STREAM_READERS = {"csv": _iter_csv, "json": _iter_json, "jsonl": _iter_jsonl, "xml": _iter_xml, "yaml": _iter_yaml}
+
+# Читатели (и потоковые читатели), умеющие сообщать о прогрессе через callback(прочитано_байт, всего_байт)
+PROGRESS_READERS = {"csv", "xlsx", "json", "jsonl", "xml", "yaml", "ini", "txt", "md", "code"}
+
+# Читатели, принимающие список листов (sheets=None — первый лист, ["*"] — все)
+SHEET_READERS = {"xlsx"}
+
+# Читатели (и потоковые читатели), умеющие читать только нужные столбцы (columns=None — все);
+# столбцы из columns, которых нет в файле, пропускаются
+COLUMN_READERS = {"csv", "xlsx"}
+
+# Читатели, умеющие остановиться после limit строк данных (limit=None — все)
+LIMIT_READERS = {"xlsx"}
+
+def _write_csv(df, path, progress=None):
+    if progress and len(df):
+        _write_csv_chunks(_progress_slices(df, progress), path)
+    else:
+        df.to_csv(path, index=False)
+
+def _progress_slices(df, progress=None, size=PROGRESS_BLOCK_ROWS):
+    """Блоки таблицы для потоковых писателей; progress(записано_строк, всего) — после записи каждого блока."""
+    total = len(df)
+    for start in range(0, total, size):
+        yield df.iloc[start:start + size]
+        if progress:
+            progress(min(start + size, total), total)
+
+def _xlsx_column_values(series):
+    """Значения столбца в виде, пригодном для openpyxl: NaN — пустая ячейка, inf — текст, как у to_excel."""
+    if pd.api.types.is_float_dtype(series.dtype):
+        values = series.astype(object)
+        values[series.isna()] = None
+        inf = series.isin([float("inf"), float("-inf")])
+        if inf.any():
+            values[inf] = series[inf].map(lambda v: "inf" if v > 0 else "-inf")
+        return values.tolist()
+    values = series.astype(object).where(series.notna(), None).tolist()
+    if series.dtype == object or isinstance(series.dtype, pd.StringDtype):
+        # Списки, словари и прочие объекты openpyxl не записывает — как и to_excel, пишем их строкой
+        values = [v if v is None or isinstance(v, _XLSX_CELL_TYPES) else str(v) for v in values]
+    return values
+
+def _xlsx_header_styled():
+    """Оформляет ли заголовок to_excel установленной версии pandas: до 3.0 — да, в pandas 3 заголовок простой."""
+    from pandas.io.formats.excel import ExcelFormatter
+    return hasattr(ExcelFormatter, "header_style")
+
+def _write_xlsx_sheet(wb, name, df, report=None):
+    ws = wb.create_sheet(title=name)
+    if _xlsx_header_styled():
+        from openpyxl.cell import WriteOnlyCell
+        from openpyxl.styles import Alignment, Border, Font, Side
+        side = Side(style=XLSX_HEADER_STYLE["border"])
+        font = Font(bold=XLSX_HEADER_STYLE["bold"])
+        border = Border(left=side, right=side, top=side, bottom=side)
+        alignment = Alignment(horizontal=XLSX_HEADER_STYLE["horizontal"], vertical=XLSX_HEADER_STYLE["vertical"])
+        header = []
+        for col in df.columns:
+            cell = WriteOnlyCell(ws, value=str(col))
+            cell.font, cell.border, cell.alignment = font, border, alignment
+            header.append(cell)
+        ws.append(header)
+    else:
+        ws.append([str(col) for col in df.columns])
+    columns = [_xlsx_column_values(df.iloc[:, i]) for i in range(len(df.columns))]
+    for done, row in enumerate(zip(*columns), 1):
+        ws.append(row)
+        if report and done % PROGRESS_BLOCK_ROWS == 0:
+            report(done)
+    if not columns:
+        for _ in range(len(df)):
+            ws.append([])
+
+def _write_xlsx(df, path, progress=None):
+    """Запись в режиме write-only: строки сразу уходят во временные файлы листов, а не копятся в памяти."""
+    from openpyxl import Workbook
+    wb = Workbook(write_only=True)
+    book = df if is_workbook(df) else {"Sheet1": df}
+    total, offset = frame_shape(df)[0], 0
+    for name, sheet in book.items():
+        report = (lambda done, offset=offset: progress(offset + done, total)) if progress else None
+        _write_xlsx_sheet(wb, name, sheet, report)
+        offset += len(sheet)
+        if progress:
+            progress(offset, total)
+    wb.save(path)
+
+def _write_json(df, path, progress=None):
+    if progress and len(df):
+        _write_json_chunks(_progress_slices(df, progress), path)
+    else:
+        df.to_json(path, orient="records", force_ascii=False, indent=2)
+
+def _write_jsonl(df, path, progress=None):
+    _write_jsonl_chunks(_progress_slices(df, progress) if progress else [df], path)
+
+def _write_xml(df, path, progress=None):
+    _write_xml_chunks(_progress_slices(df, progress) if progress else [df], path)
+
+def _write_yaml(df, path, progress=None):
+    _write_yaml_chunks(_progress_slices(df, progress, YAML_BLOCK_ROWS), path)
+
+def _write_ini(df, path, progress=None):
+    """Каждая строка — секция; вывод совпадает с ConfigParser.write, но собирается по столбцам."""
+    sections = [str(idx) for idx in df.index]
+    keys = [str(col).lower() for col in df.columns]
+    if len(set(sections)) != len(sections) or "DEFAULT" in sections or len(set(keys)) != len(keys):
+        return _write_ini_configparser(df, path)
+    prefixes = [key + " = " for key in keys]
+    with open(path, "w", encoding="utf-8") as f:
+        for start in range(0, len(df), INI_BLOCK_ROWS):
+            values = df.iloc[start:start + INI_BLOCK_ROWS].to_numpy()
+            cells = [_xml_column_cells(values, j) for j in range(len(keys))]
+            if values.dtype == object:
+                cells = _iterrows_text_rows(cells)
+            columns = [[prefix + _ini_value(v) + "\n" for v in column]
+                       for prefix, column in zip(prefixes, cells)]
+            f.write("".join(f"[{name}]\n" + "".join(parts) + "\n"
+                            for name, parts in zip(sections[start:start + INI_BLOCK_ROWS],
+                                                   zip(*columns) if columns else [()] * len(values))))
+            if progress:
+                progress(start + len(values), len(df))
+
+def _ini_value(val):
+    # % удваивается, чтобы ConfigParser с интерполяцией прочитал значение без изменений
+    return str(val).replace("%", "%%").replace("\n", "\n\t")
+
+def _write_ini_configparser(df, path):
+    """Запасной путь через ConfigParser: повторяющиеся секции и ключи, секция DEFAULT."""
+    cp = configparser.ConfigParser(interpolation=None)
     for idx, row in df.iterrows():
-        section = str(row.name) if df.index.name else str(idx)
-        cp[section] = {str(col): str(row[col]) for col in df.columns}
+        cp[str(idx)] = {str(col): str(row[col]).replace("%", "%%") for col in df.columns}
     with open(path, "w", encoding="utf-8") as f:
         cp.write(f)
 
-def _write_md(df, path):
-    with open(path, "w", encoding="utf-8") as f:
-        f.write(df.to_markdown(index=False))
+# --- Потоковая запись таблиц Markdown и TXT ---
+# Строк в одном блоке при записи таблиц Markdown и TXT; меньшие таблицы рендерятся целиком
+TEXT_TABLE_BLOCK_ROWS = 10000
+# Перевод строки включает многострочный режим tabulate, ESC — учёт ANSI-кодов, \x01 — разделительные строки
+_MD_FALLBACK_CHARS = re.compile(r"[\r\n\x1b\x01]")
+
+# Версии tabulate, с внутренними функциями которых (_type, _more_generic, _afterpoint,
+# _format, wcwidth) сверен потоковый путь _write_md; с другими версиями пишет to_markdown
+MD_TABULATE_VERSIONS = ("0.10.",)
+_MD_TABULATE_INTERNALS = ("_type", "_more_generic", "_afterpoint", "_format", "wcwidth", "WIDE_CHARS_MODE")
+
+class _TableFallback(Exception):
+    """Таблицу нужно отрендерить целиком штатными средствами (to_markdown/to_string)."""
+
+class _MdColumn:
+    """Столбец Markdown-таблицы: тип и ширина по правилам tabulate, накапливаемые по блокам строк.
+
+    kind — быстрый векторный путь ("int", "float", "bool") или None: значения разбираются
+    по одному функциями tabulate. Для десятичного выравнивания хранится пара
+    (наибольшая ширина без дробной части, наибольшее число знаков после точки)
+    отдельно для текста значений и для их float-представления.
+    """
+
+    def __init__(self, header, kind):
+        self.header = header
+        self.kind = kind
+        self.type = {"int": int, "float": float, "bool": bool}.get(kind, bool)
+        self.text_width = 0
+        self.raw = (0, -1)
+        self.floats = (0, -1)
+        self.align = self.width = self.decimals = None
+
+def _md_column_kind(values_dtype, column):
+    """Вид столбца: tabulate получает значения из df.values, поэтому тип зависит от общего dtype таблицы."""
+    if values_dtype.kind == "i":
+        return "int"
+    if values_dtype.kind in "fub":
+        # numpy-скаляры uint и bool tabulate не считает целыми и печатает как float
+        return "float"
+    if values_dtype == object and isinstance(column.dtype, np.dtype):
+        return {"i": "int", "u": "int", "f": "float", "b": "bool"}.get(column.dtype.kind)
+    return None
+
+def _md_values_dtype(df):
+    """dtype массива df.values, не зависящий от данных, или None.
+
+    У столбцов с расширенными типами (Int64, category) итоговый dtype зависит от наличия
+    пропусков; ему можно доверять, только если строковый столбец заранее делает массив object.
+    """
+    if all(isinstance(dtype, np.dtype) for dtype in df.dtypes):
+        return df.iloc[:0].to_numpy().dtype
+    if any(dtype == object or isinstance(dtype, pd.StringDtype) for dtype in df.dtypes):
+        return np.dtype(object)
+    return None
+
+def _md_width_fn(tab):
+    """Ширина ячейки как у tabulate: wcwidth для широких символов, если он установлен."""
+    if tab.wcwidth is not None and tab.WIDE_CHARS_MODE:
+        wcswidth = tab.wcwidth.wcswidth
+        return lambda s: len(s) if s.isascii() and s.isprintable() else wcswidth(s)
+    return len
+
+def _md_cell_text(v):
+    return "" if v is None or (isinstance(v, str) and not v) else f"{v}"
+
+def _g_format(values):
+    """format(x, "g") для массива чисел и число знаков после точки (или экспоненты) по правилу tabulate."""
+    texts = np.char.mod("%g", values.astype(np.float64))
+    lengths = np.char.str_len(texts)
+    dot, exp = np.char.find(texts, "."), np.char.find(texts, "e")
+    decimals = np.where(dot >= 0, lengths - dot - 1, np.where(exp >= 0, lengths - exp - 1, -1))
+    return texts, lengths, decimals
+
+def _merge_decimal(stats, widths, decimals):
+    return max(stats[0], max(w - d for w, d in zip(widths, decimals))), max(stats[1], max(decimals))
+
+def _md_scan(col, values, typed, tab, width):
+    """Первый проход: тип столбца и ширины по очередному блоку значений."""
+    if col.kind == "int":
+        col.raw = (max(col.raw[0], int(np.char.str_len(typed.astype(str)).max()) + 1), -1)
+    elif col.kind == "float":
+        _, lengths, decimals = _g_format(typed)
+        col.floats = (max(col.floats[0], int((lengths - decimals).max())), max(col.floats[1], int(decimals.max())))
+    elif col.kind == "bool":
+        col.text_width = max(col.text_width, 4 if typed.all() else 5)
+    else:
+        if any(isinstance(v, bytes) for v in values):
+            raise _TableFallback()
+        texts = [_md_cell_text(v) for v in values]
+        if _MD_FALLBACK_CHARS.search("".join(texts)):
+            raise _TableFallback()
+        col.text_width = max(col.text_width, max(width(t.strip()) for t in texts))
+        if col.type is not str:
+            for v in values:
+                col.type = tab._more_generic(col.type, tab._type(v, False))
+                if col.type is str:
+                    break
+        if col.type is bytes:
+            raise _TableFallback()
+        if col.type is not str:
+            col.raw = _merge_decimal(col.raw, map(width, texts), [tab._afterpoint(t) for t in texts])
+            floats = [tab._format(v, float, "g", "", "", False) for v in values]
+            col.floats = _merge_decimal(col.floats, map(width, floats), [tab._afterpoint(t) for t in floats])
+
+def _md_finish(col, width):
+    """Выравнивание и итоговая ширина столбца; заголовок занимает не меньше своей ширины + 2."""
+    if col.type in (int, float):
+        col.align = "decimal"
+        stats = col.floats if col.type is float else col.raw
+        # Для векторного int-пути в raw хранится ширина + 1 при -1 знаков после точки
+        col.width, col.decimals = stats[0] + stats[1], stats[1]
+    else:
+        col.align = "left"
+        col.width = col.text_width
+    col.width = max(col.width, width(col.header) + 2)
+
+def _md_render(col, values, typed, tab, width):
+    """Второй проход: ячейки блока, дополненные пробелами до ширины столбца."""
+    w = col.width
+    if col.kind == "int":
+        return [t.rjust(w) for t in typed.astype(str).tolist()]
+    if col.kind == "float":
+        texts, _, decimals = _g_format(typed)
+        return [(t + " " * (col.decimals - d)).rjust(w) for t, d in zip(texts.tolist(), decimals.tolist())]
+    if col.kind == "bool":
+        return [("True" if v else "False").ljust(w) for v in typed.tolist()]
+    if col.type is float:
+        texts = [tab._format(v, float, "g", "", "", False) for v in values]
+    else:
+        texts = [_md_cell_text(v) for v in values]
+    if col.align == "decimal":
+        texts = [t + " " * (col.decimals - tab._afterpoint(t)) for t in texts]
+        return [" " * (w - width(t)) + t for t in texts]
+    texts = [t.strip() for t in texts]
+    return [t + " " * (w - width(t)) for t in texts]
+
+def _md_streaming_supported(tab):
+    return (getattr(tab, "__version__", "").startswith(MD_TABULATE_VERSIONS)
+            and all(hasattr(tab, name) for name in _MD_TABULATE_INTERNALS))
+
+def _md_blocks(df):
+    for start in range(0, len(df), TEXT_TABLE_BLOCK_ROWS):
+        block = df.iloc[start:start + TEXT_TABLE_BLOCK_ROWS]
+        yield block, block.to_numpy()
+
+def _write_md(df, path, progress=None):
+    """Таблица как у df.to_markdown(index=False), но без построения всей таблицы одной строкой.
+
+    Первый проход по блокам определяет тип и ширину столбцов по правилам tabulate,
+    второй пишет строки блоками. Таблицы, которые tabulate выводит особым образом
+    (многострочные ячейки, ANSI-коды, bytes), небольшие таблицы и таблицы при
+    непроверенной версии tabulate рендерятся целиком.
+    """
+    import tabulate as tab
+    if (len(df) <= TEXT_TABLE_BLOCK_ROWS or not len(df.columns) or isinstance(df.columns, pd.MultiIndex)
+            or not _md_streaming_supported(tab)):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(df.to_markdown(index=False))
+        return
+    try:
+        _write_md_blocks(df, path, tab, progress)
+    except (_TableFallback, AttributeError, TypeError):
+        # Особая таблица или изменившиеся внутренности tabulate — файл переписывается целиком
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(df.to_markdown(index=False))
+
+def _write_md_blocks(df, path, tab, progress=None):
+    width = _md_width_fn(tab)
+    values_dtype = _md_values_dtype(df)
+    if values_dtype is None:
+        raise _TableFallback()
+    columns = [_MdColumn(str(name), _md_column_kind(values_dtype, df.iloc[:, j]))
+               for j, name in enumerate(df.columns)]
+    if _MD_FALLBACK_CHARS.search("".join(col.header for col in columns)):
+        raise _TableFallback()
+    for block, values in _md_blocks(df):
+        for j, col in enumerate(columns):
+            _md_scan(col, values[:, j], block.iloc[:, j].to_numpy(), tab, width)
+    for col in columns:
+        _md_finish(col, width)
 
-def _write_txt(df, path):
+    with open(path, "w", encoding="utf-8") as f:
+        headers = [" " * (col.width - width(col.header)) + col.header if col.align == "decimal"
+                   else col.header + " " * (col.width - width(col.header)) for col in columns]
+        rule = ["-" * (col.width + 1) + ":" if col.align == "decimal" else ":" + "-" * (col.width + 1)
+                for col in columns]
+        f.write("| " + " | ".join(headers) + " |\n|" + "|".join(rule) + "|")
+        written = 0
+        for block, values in _md_blocks(df):
+            cells = [_md_render(col, values[:, j], block.iloc[:, j].to_numpy(), tab, width)
+                     for j, col in enumerate(columns)]
+            f.write("".join("\n| " + " | ".join(row) + " |" for row in zip(*cells)))
+            written += len(block)
+            if progress:
+                progress(written, len(df))
+
+def _write_txt(df, path, progress=None):
+    """Таблица как у df.to_string(index=False), собираемая по столбцам.
+
+    Формат столбца pandas выбирает по всем его значениям (точность float, формат дат),
+    поэтому столбцы рендерятся pandas по одному и складываются во временные файлы,
+    а затем строки склеиваются и пишутся блоками: в памяти один столбец, а не вся таблица.
+    """
+    if (len(df) <= TEXT_TABLE_BLOCK_ROWS or not len(df.columns) or isinstance(df.columns, pd.MultiIndex)
+            or df.columns.name is not None):
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(df.to_string(index=False))
+        return
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(path))) as tmp_dir:
+        parts = []
+        for j in range(len(df.columns)):
+            lines = df.iloc[:, [j]].to_string(index=False).split("\n")
+            if len(lines) != len(df) + 1:
+                # Значение с переводом строки: столбцы нельзя склеить построчно
+                break
+            part = os.path.join(tmp_dir, f"{j}.txt")
+            with open(part, "w", encoding="utf-8") as f:
+                f.write("\n".join(lines))
+            parts.append(part)
+            del lines
+        else:
+            files = [open(part, "r", encoding="utf-8", newline="\n") for part in parts]
+            try:
+                rows = zip(*files)
+                with open(path, "w", encoding="utf-8") as out:
+                    out.write(" ".join(cell.rstrip("\n") for cell in next(rows)))
+                    written = 0
+                    for block in _batched(rows, TEXT_TABLE_BLOCK_ROWS):
+                        out.write("".join("\n" + " ".join(cell.rstrip("\n") for cell in row) for row in block))
+                        written += len(block)
+                        if progress:
+                            progress(written, len(df))
+            finally:
+                for f in files:
+                    f.close()
+            return
     with open(path, "w", encoding="utf-8") as f:
         f.write(df.to_string(index=False))
 
 WRITERS = {
-    "csv": _write_csv, "xlsx": _write_xlsx, "json": _write_json,
+    "csv": _write_csv, "xlsx": _write_xlsx, "json": _write_json, "jsonl": _write_jsonl,
     "xml": _write_xml, "yaml": _write_yaml, "ini": _write_ini,
     "md": _write_md, "txt": _write_txt
 }
 
-def read_data(filepath, ftype):
+# Писатели, сохраняющие книгу из нескольких листов как есть; остальным листы сводятся в одну таблицу
+WORKBOOK_WRITERS = {"xlsx"}
+
+# Писатели, сообщающие о прогрессе через callback(записано_строк, всего_строк)
+# (таблицы Markdown и TXT — при блочной записи; колоночные форматы добавляются вместе с pyarrow)
+PROGRESS_WRITERS = {"csv", "xlsx", "json", "jsonl", "xml", "yaml", "ini", "md", "txt"}
+
+# Потоковые писатели: дописывают чанки в один файл, результат совпадает с обычными писателями
+class StreamSchemaError(ValueError):
+    """Очередной чанк не согласуется со схемой, уже записанной в выходной файл (заголовок CSV, схема Arrow)."""
+
+def _write_csv_chunks(chunks, path):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        columns = None
+        for chunk in chunks:
+            if columns is None:
+                columns = chunk.columns
+                chunk.to_csv(f, index=False)
+                continue
+            if not chunk.columns.equals(columns):
+                extra = chunk.columns.difference(columns, sort=False)
+                if len(extra):
+                    raise StreamSchemaError(f"Столбцы {', '.join(map(str, extra))} появились после записи "
+                                                 f"заголовка CSV")
+                chunk = chunk.reindex(columns=columns)
+            chunk.to_csv(f, index=False, header=False)
+
+def _write_jsonl_chunks(chunks, path):
+    """Одна запись на строку; большие чанки сериализуются частями по JSONL_BATCH_ROWS строк."""
+    with open(path, "w", encoding="utf-8") as f:
+        for chunk in chunks:
+            for start in range(0, len(chunk), JSONL_BATCH_ROWS):
+                body = chunk.iloc[start:start + JSONL_BATCH_ROWS].to_json(
+                    orient="records", lines=True, force_ascii=False)
+                f.write(body if body.endswith("\n") else body + "\n")
+
+def _write_json_chunks(chunks, path):
+    with open(path, "w", encoding="utf-8") as f:
+        written = False
+        for chunk in chunks:
+            if chunk.empty:
+                continue
+            body = chunk.to_json(orient="records", force_ascii=False, indent=2)
+            # Каждый чанк — это "[\n ... \n]": склеиваем внутренности в один массив
+            f.write(",\n" + body[2:-2] if written else body[:-2])
+            written = True
+        f.write("\n]" if written else "[\n\n]")
+
+def _write_xml_chunks(chunks, path):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("<?xml version='1.0' encoding='utf-8'?>\n")
+        written = False
+        columns, tags = None, None
+        for chunk in chunks:
+            if not len(chunk):
+                continue
+            if columns is None or not chunk.columns.equals(columns):
+                columns = chunk.columns
+                tags = [xml_safe_tag(col) for col in columns]
+            if not written:
+                f.write("<records>")
+                written = True
+            for start in range(0, len(chunk), XML_BLOCK_ROWS):
+                f.write(_render_xml_records(chunk.iloc[start:start + XML_BLOCK_ROWS], tags))
+        f.write("</records>" if written else "<records />")
+
+def _write_yaml_chunks(chunks, path):
+    dumper = _yaml_dumper()
+    with open(path, "w", encoding="utf-8") as f:
+        written = False
+        for chunk in chunks:
+            # Элементы последовательности верхнего уровня не имеют отступа, поэтому
+            # последовательные дампы складываются в одну валидную YAML-последовательность
+            for start in range(0, len(chunk), YAML_BLOCK_ROWS):
+                records = chunk.iloc[start:start + YAML_BLOCK_ROWS].to_dict(orient="records")
+                yaml.dump(records, f, Dumper=dumper, allow_unicode=True)
+                written = True
+        if not written:
+            yaml.dump([], f, Dumper=dumper, allow_unicode=True)
+
+CHUNK_WRITERS = {
+    "csv": _write_csv_chunks, "json": _write_json_chunks, "jsonl": _write_jsonl_chunks,
+    "xml": _write_xml_chunks, "yaml": _write_yaml_chunks
+}
+
+# --- Колоночные форматы (pyarrow) ---
+def _existing_columns(columns, names):
+    """Столбцы из columns, которые есть в схеме файла (в порядке файла), или None, если таких нет."""
+    wanted = set(columns)
+    return [name for name in names if name in wanted] or None
+
+def _read_parquet(path, columns=None):
+    # memory_map: страницы файла отображаются в память, а не копируются в буфер чтения;
+    # columns читает только нужные столбцы во всех группах строк
+    if columns:
+        columns = _existing_columns(columns, pq.read_schema(path, memory_map=True).names)
+    return pq.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+def _is_legacy_feather(path):
+    with open(path, "rb") as f:
+        return f.read(4) == b"FEA1"
+
+def _read_feather(path, columns=None):
+    if columns:
+        # Схему Feather v1 не прочитать отдельно от данных: такие файлы читаются целиком
+        columns = None if _is_legacy_feather(path) else _existing_columns(columns, _ipc_schema(path).names)
+    return feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+def _ipc_schema(path):
+    with pa.memory_map(path, "r") as source:
+        return _open_ipc(source).schema
+
+def _open_ipc(source):
+    """Читатель Arrow IPC: файловый формат (с произвольным доступом к батчам) или потоковый."""
+    try:
+        return pa.ipc.open_file(source)
+    except pa.ArrowInvalid:
+        source.seek(0)
+        return pa.ipc.open_stream(source)
+
+def _ipc_batches(reader):
+    if isinstance(reader, pa.ipc.RecordBatchFileReader):
+        return (reader.get_batch(i) for i in range(reader.num_record_batches))
+    return iter(reader)
+
+def _read_arrow(path, columns=None):
+    # Несжатый файл IPC читается без копирования: буферы столбцов указывают прямо в отображённый файл
+    with pa.memory_map(path, "r") as source:
+        table = _open_ipc(source).read_all()
+        columns = _existing_columns(columns, table.schema.names) if columns else None
+        if columns:
+            table = table.select(columns)
+        return table.to_pandas()
+
+def _iter_parquet(path, chunksize, columns=None):
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    if columns:
+        columns = _existing_columns(columns, parquet_file.schema_arrow.names)
+    for batch in parquet_file.iter_batches(batch_size=chunksize, columns=columns):
+        yield batch.to_pandas()
+
+def _iter_arrow(path, chunksize, columns=None):
+    with pa.memory_map(path, "r") as source:
+        reader = _open_ipc(source)
+        columns = _existing_columns(columns, reader.schema.names) if columns else None
+        for batch in _ipc_batches(reader):
+            if columns:
+                batch = batch.select(columns)
+            for start in range(0, batch.num_rows, chunksize):
+                yield batch.slice(start, chunksize).to_pandas()
+
+def _iter_feather(path, chunksize, columns=None):
+    if _is_legacy_feather(path):
+        # Feather v1 не является файлом Arrow IPC и читается целиком
+        yield from _slice_chunks(_read_feather(path, columns), chunksize)
+    else:
+        yield from _iter_arrow(path, chunksize, columns)
+
+def _preview_parquet(path, n):
+    parquet_file = pq.ParquetFile(path, memory_map=True)
+    batch = next(parquet_file.iter_batches(batch_size=n), None)
+    return batch.to_pandas() if batch is not None else parquet_file.schema_arrow.empty_table().to_pandas()
+
+def _preview_arrow(path, n):
+    return _first_chunk(_iter_arrow(path, n))
+
+def _preview_feather(path, n):
+    return _first_chunk(_iter_feather(path, n))
+
+def _first_chunk(chunks):
+    try:
+        return next(chunks, pd.DataFrame())
+    finally:
+        chunks.close()
+
+def _arrow_table(df):
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+# Строк в одном срезе при записи колоночных форматов с прогрессом: столько же, сколько
+# pyarrow по умолчанию кладёт в группу строк Parquet и в пакет Feather, поэтому файл не меняется
+PARQUET_PROGRESS_ROWS = 1024 * 1024
+IPC_PROGRESS_ROWS = 64 * 1024
+
+def _write_arrow_table_progress(df, path, open_writer, block_rows, progress):
+    """Пишет таблицу срезами по block_rows строк; progress(записано_строк, всего) — после каждого среза."""
+    table = _arrow_table(df)
+    with open_writer(path, table.schema) as writer:
+        for start in range(0, table.num_rows, block_rows):
+            writer.write_table(table.slice(start, block_rows))
+            progress(min(start + block_rows, table.num_rows), table.num_rows)
+
+def _write_parquet(df, path, progress=None):
+    if progress:
+        _write_arrow_table_progress(df, path, pq.ParquetWriter, PARQUET_PROGRESS_ROWS, progress)
+    else:
+        pq.write_table(_arrow_table(df), path)
+
+def _write_feather(df, path, progress=None):
+    if progress:
+        options = pa.ipc.IpcWriteOptions(compression="lz4")
+        _write_arrow_table_progress(df, path, lambda p, schema: pa.ipc.new_file(p, schema, options=options),
+                                    IPC_PROGRESS_ROWS, progress)
+    else:
+        feather.write_feather(_arrow_table(df), path)
+
+def _write_arrow(df, path, progress=None):
+    # Без сжатия, чтобы последующее чтение через memory_map обходилось без копирования
+    if progress:
+        _write_arrow_table_progress(df, path, pa.ipc.new_file, IPC_PROGRESS_ROWS, progress)
+        return
+    table = _arrow_table(df)
+    with pa.ipc.new_file(path, table.schema) as writer:
+        writer.write_table(table)
+
+def _write_arrow_table_chunks(chunks, path, open_writer):
+    """Пишет чанки в один файл; схема берётся из первого чанка, следующие приводятся к ней."""
+    writer, schema = None, None
+    try:
+        for chunk in chunks:
+            table = _arrow_table(chunk)
+            if writer is None:
+                schema = table.schema
+                writer = open_writer(path, schema)
+            elif not table.schema.equals(schema):
+                try:
+                    table = table.cast(schema)
+                except (pa.ArrowInvalid, pa.ArrowNotImplementedError, ValueError) as e:
+                    raise StreamSchemaError(f"Схема чанка не совпадает с уже записанной: {e}") from e
+            writer.write_table(table)
+        if writer is None:
+            writer = open_writer(path, pa.schema([]))
+    finally:
+        if writer is not None:
+            writer.close()
+
+def _write_parquet_chunks(chunks, path):
+    # Каждый чанк становится отдельной группой строк
+    _write_arrow_table_chunks(chunks, path, pq.ParquetWriter)
+
+def _write_feather_chunks(chunks, path):
+    options = pa.ipc.IpcWriteOptions(compression="lz4")
+    _write_arrow_table_chunks(chunks, path, lambda p, schema: pa.ipc.new_file(p, schema, options=options))
+
+def _write_arrow_chunks(chunks, path):
+    _write_arrow_table_chunks(chunks, path, pa.ipc.new_file)
+
+if ARROW_AVAILABLE:
+    SUPPORTED_FORMATS += COLUMNAR_FORMATS
+    COLUMN_READERS.update(COLUMNAR_FORMATS)
+    READERS.update({"parquet": _read_parquet, "feather": _read_feather, "arrow": _read_arrow})
+    PREVIEW_READERS.update({"parquet": _preview_parquet, "feather": _preview_feather, "arrow": _preview_arrow})
+    STREAM_READERS.update({"parquet": _iter_parquet, "feather": _iter_feather, "arrow": _iter_arrow})
+    WRITERS.update({"parquet": _write_parquet, "feather": _write_feather, "arrow": _write_arrow})
+    CHUNK_WRITERS.update({"parquet": _write_parquet_chunks, "feather": _write_feather_chunks,
+                          "arrow": _write_arrow_chunks})
+    PROGRESS_WRITERS.update(COLUMNAR_FORMATS)
+
+# --- Выборка столбцов и строк ---
+# Размер чанка для полного чтения с limit и условием: чтение прекращается, как только набрано limit строк
+SELECT_CHUNK_ROWS = 100000
+_QUERY_STRINGS = re.compile(r"'(?:[^'\\]|\\.)*'|\"(?:[^\"\\]|\\.)*\"")
+_QUERY_NAMES = re.compile(r"`([^`]+)`|([^\W\d]\w*)")
+
+class Selection:
+    """Выборка при чтении: столбцы (в заданном порядке), условие DataFrame.query и предел числа строк."""
+
+    __slots__ = ("columns", "where", "limit")
+
+    def __init__(self, columns=None, where=None, limit=None):
+        if limit is not None and limit < 0:
+            raise ValueError(f"Лимит строк не может быть отрицательным: {limit}")
+        self.columns = list(columns) if columns else None
+        self.where = where.strip() if where and where.strip() else None
+        self.limit = limit
+
+    def __bool__(self):
+        return bool(self.columns or self.where or self.limit is not None)
+
+    def __repr__(self):
+        return f"Selection(columns={self.columns!r}, where={self.where!r}, limit={self.limit!r})"
+
+    def to_dict(self):
+        return {"columns": self.columns, "where": self.where, "limit": self.limit}
+
+    def needed_columns(self):
+        """Столбцы, которые достаточно прочитать: выбранные и упомянутые в условии (None — все).
+
+        Имена из условия берутся с запасом (вместе со словами вроде and): читатели
+        пропускают столбцы, которых нет в файле.
+        """
+        if not self.columns:
+            return None
+        needed = list(self.columns)
+        if self.where:
+            needed += [quoted or name for quoted, name in _QUERY_NAMES.findall(_QUERY_STRINGS.sub("", self.where))]
+        return list(dict.fromkeys(needed))
+
+    def apply(self, df, taken=0):
+        """Применяет условие, выбор столбцов и limit (за вычетом уже отобранных taken строк)."""
+        if is_workbook(df):
+            return {name: self.apply(sheet) for name, sheet in df.items()}
+        if self.where:
+            try:
+                df = df.query(self.where).reset_index(drop=True)
+            except (NameError, SyntaxError, TypeError, ValueError, KeyError) as e:
+                raise ValueError(f"Ошибка в условии «{self.where}»: {e}") from e
+        if self.columns:
+            missing = [name for name in self.columns if name not in df.columns]
+            if missing:
+                raise ValueError(f"Столбцы не найдены: {', '.join(missing)}; "
+                                 f"в таблице: {', '.join(map(str, df.columns))}")
+            df = df[self.columns]
+        if self.limit is not None:
+            df = df.iloc[:max(self.limit - taken, 0)]
+        return df
+
+def _select_chunks(chunks, selection):
+    """Выборка по чанкам; после limit строк исходный итератор закрывается и файл дальше не читается."""
+    taken, started = 0, False
+    try:
+        for chunk in chunks:
+            chunk = selection.apply(chunk, taken)
+            # Пустые чанки после первого не нужны: схема результата уже известна писателю
+            if len(chunk) or not started:
+                started = True
+                taken += len(chunk)
+                yield chunk
+            if selection.limit is not None and taken >= selection.limit:
+                return
+    finally:
+        chunks.close()
+
+def _read_selected(filepath, ftype, progress, csv_profile, selection):
+    """Полное чтение с limit через потоковый читатель: файл читается только до limit отобранных строк."""
+    chunksize = SELECT_CHUNK_ROWS if selection.where else max(1, min(selection.limit, SELECT_CHUNK_ROWS))
+    frames = list(_iter_chunks(filepath, ftype, chunksize, progress=progress, csv_profile=csv_profile,
+                               selection=selection))
+    if progress:
+        size = os.path.getsize(filepath)
+        progress(size, size)
+    if not frames:
+        return pd.DataFrame()
+    return pd.concat(frames, ignore_index=True) if len(frames) > 1 else frames[0].reset_index(drop=True)
+
+def _iter_chunks(filepath, ftype, chunksize, sheets=None, progress=None, csv_profile=None, selection=None):
+    stream_reader = STREAM_READERS.get(ftype)
+    if stream_reader:
+        kwargs = _reader_kwargs(ftype, _read_options(ftype, csv_profile=csv_profile), selection)
+        if progress and ftype in PROGRESS_READERS:
+            kwargs["progress"] = progress
+        chunks = stream_reader(filepath, chunksize, **kwargs)
+        yield from _select_chunks(chunks, selection) if selection else chunks
+        return
+    df = ensure_dataframe(read_data(filepath, ftype, progress=progress, sheets=sheets, selection=selection))
+    if is_workbook(df):
+        df = combine_sheets(df)
+    yield from _slice_chunks(df, chunksize)
+
+def _slice_chunks(df, chunksize):
+    for start in range(0, len(df), chunksize):
+        yield df.iloc[start:start + chunksize]
+
+def _read_options(ftype, sheets=None, csv_profile=None, selection=None):
+    """Параметры чтения, влияющие на результат разбора (входят и в ключ кэша)."""
+    options = {}
+    if ftype in SHEET_READERS and sheets:
+        options["sheets"] = sheets
+    if ftype == "csv":
+        # Профиль по умолчанию тоже входит в ключ: он определяет разделитель и кодировку
+        options["csv_profile"] = csv_profile or CSV_DEFAULTS
+    if selection:
+        options["selection"] = selection.to_dict()
+    return options
+
+def _reader_kwargs(ftype, options, selection):
+    """Аргументы читателя: параметры разбора и та часть выборки, которую читатель выполняет сам."""
+    kwargs = {key: value for key, value in options.items() if key != "selection"}
+    if selection:
+        columns = selection.needed_columns()
+        if columns and ftype in COLUMN_READERS:
+            kwargs["columns"] = columns
+        if selection.limit is not None and not selection.where and ftype in LIMIT_READERS:
+            kwargs["limit"] = selection.limit
+    return kwargs
+
+def _unsupported_format(ftype, action):
+    if ftype in COLUMNAR_FORMATS and not ARROW_AVAILABLE:
+        return ValueError(f"Для формата {ftype} требуется pyarrow: pip install pyarrow")
+    return ValueError(f"Неподдерживаемый формат для {action}: {ftype}")
+
+def read_data(filepath, ftype, chunksize=None, progress=None, cache=None, sheets=None, csv_profile=None,
+              selection=None):
+    """Читает файл целиком или, если задан chunksize, возвращает итератор DataFrame-чанков.
+
+    При переданном ParseCache полный результат разбора берётся из кэша и сохраняется в него.
+    Для книг XLSX sheets выбирает листы (None — первый, ["*"] — все); несколько листов
+    возвращаются словарём {лист: DataFrame}.
+    CSV читается по csv_profile (см. build_csv_profile; None — профиль по умолчанию).
+    selection (Selection) отбирает столбцы и строки; читатели из COLUMN_READERS разбирают только
+    нужные столбцы, а при limit потоковые форматы читаются лишь до набранного числа строк.
+    progress(прочитано_байт, всего_байт) сообщает о ходе чтения; читатели без поддержки
+    прогресса (колоночные форматы, попадание в кэш) сообщают только о завершении.
+    """
     reader = READERS.get(ftype)
     if not reader:
-        raise ValueError(f"Неподдерживаемый формат для чтения: {ftype}")
-    return reader(filepath)
+        raise _unsupported_format(ftype, "чтения")
+    selection = selection or None
+    if chunksize:
+        return _iter_chunks(filepath, ftype, chunksize, sheets, progress, csv_profile, selection)
+    options = _read_options(ftype, sheets, csv_profile, selection)
+    if cache:
+        data = cache.get(filepath, ftype, options)
+        if data is not None:
+            if progress:
+                size = os.path.getsize(filepath)
+                progress(size, size)
+            return data
+    if selection and selection.limit is not None and ftype in STREAM_READERS:
+        data = _read_selected(filepath, ftype, progress, csv_profile, selection)
+    else:
+        kwargs = _reader_kwargs(ftype, options, selection)
+        if progress and ftype in PROGRESS_READERS:
+            kwargs["progress"] = progress
+        data = reader(filepath, **kwargs)
+        if progress and ftype not in PROGRESS_READERS:
+            size = os.path.getsize(filepath)
+            progress(size, size)
+        if selection:
+            data = selection.apply(ensure_dataframe(data))
+    if cache:
+        cache.put(filepath, ftype, data, options)
+    return data
+
+def read_preview(filepath, ftype, n, csv_profile=None):
+    """Читает только начало файла для предпросмотра; форматы без быстрого пути читаются целиком."""
+    reader = PREVIEW_READERS.get(ftype)
+    if reader:
+        return reader(filepath, n, csv_profile) if ftype == "csv" else reader(filepath, n)
+    data = read_data(filepath, ftype)
+    return data.head(n) if isinstance(data, pd.DataFrame) else data
 
-def save_data(df, out_path, out_fmt):
+def save_data(df, out_path, out_fmt, progress=None):
+    """Сохраняет таблицу; progress(записано_строк, всего_строк) сообщает о ходе записи."""
     writer = WRITERS.get(out_fmt)
     if not writer:
-        raise ValueError(f"Неподдерживаемый формат для сохранения: {out_fmt}")
-    writer(df, out_path)
+        raise _unsupported_format(out_fmt, "сохранения")
+    if is_workbook(df) and out_fmt not in WORKBOOK_WRITERS:
+        df = combine_sheets(df)
+    if progress and out_fmt in PROGRESS_WRITERS:
+        writer(df, out_path, progress=progress)
+    else:
+        writer(df, out_path)
+    if progress:
+        # Писатель мог записать таблицу целиком без промежуточных отчётов (небольшие таблицы)
+        rows = frame_shape(df)[0]
+        progress(rows, rows)
+
+def save_chunks(chunks, out_path, out_fmt):
+    """Сохраняет итератор чанков; форматы без потоковой записи собираются в один DataFrame."""
+    writer = CHUNK_WRITERS.get(out_fmt)
+    if writer:
+        writer(chunks, out_path)
+    else:
+        frames = list(chunks)
+        save_data(pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(), out_path, out_fmt)
+
+def save_data_multi(df, targets, max_workers=None, progress=None):
+    """Записывает один DataFrame сразу в несколько форматов параллельными потоками.
+
+    targets — список пар (путь, формат). Возвращает список (путь, формат, ошибка),
+    где ошибка равна None для успешно записанных файлов. progress получает сумму
+    записанных строк по всем целевым файлам.
+    """
+    for _, out_fmt in targets:
+        if out_fmt not in WRITERS:
+            raise _unsupported_format(out_fmt, "сохранения")
+
+    # Листы книги сводятся в одну таблицу один раз на все форматы без поддержки листов
+    combined = None
+    if is_workbook(df) and any(out_fmt not in WORKBOOK_WRITERS for _, out_fmt in targets):
+        combined = combine_sheets(df)
+
+    # Ключи заполнены заранее: потоки меняют только значения, и сумма считается без гонок по размеру словаря
+    written = dict.fromkeys(range(len(targets)), 0)
+    total = frame_shape(df)[0] * len(targets)
+
+    def target_progress(i):
+        def report(done, _total):
+            written[i] = done
+            progress(sum(written.values()), total)
+        return report if progress else None
+
+    def write(i, target):
+        out_path, out_fmt = target
+        try:
+            save_data(df if combined is None or out_fmt in WORKBOOK_WRITERS else combined, out_path, out_fmt,
+                      target_progress(i))
+            return out_path, out_fmt, None
+        except Exception as e:
+            return out_path, out_fmt, e
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(targets) or 1) as pool:
+        return list(pool.map(write, range(len(targets)), targets))
+
+def is_streamable(in_fmt, out_fmt=None):
+    """Можно ли сконвертировать файл чанками, не загружая его в память целиком."""
+    return in_fmt in STREAM_READERS and (out_fmt is None or out_fmt in CHUNK_WRITERS)
+
+def stream_convert(src, in_fmt, dst, out_fmt, chunksize, metrics=None, progress=None, csv_profile=None,
+                   selection=None):
+    """Потоковая конвертация с ограниченным потреблением памяти; возвращает число строк.
+
+    Чтение и запись чередуются, поэтому в metrics время разбора (ожидание очередного
+    чанка) и время записи суммируются отдельно. progress — ProgressTracker: получает
+    прочитанные байты и число строк после каждого чанка.
+    """
+    rows, cols, parse_seconds = 0, 0, 0.0
+
+    def counted(chunks):
+        nonlocal rows, cols, parse_seconds
+        while True:
+            started = time.perf_counter()
+            chunk = next(chunks, None)
+            parse_seconds += time.perf_counter() - started
+            if chunk is None:
+                return
+            rows += len(chunk)
+            cols = max(cols, len(chunk.columns))
+            if progress:
+                progress.rows(rows)
+            yield chunk
+
+    started = time.perf_counter()
+    try:
+        chunks = read_data(src, in_fmt, chunksize=chunksize, progress=progress.read if progress else None,
+                           csv_profile=csv_profile, selection=selection)
+        save_chunks(counted(chunks), dst, out_fmt)
+    except StreamSchemaError:
+        # Записи без единой схемы (например, NDJSON-логи): схема результата известна только после полного чтения
+        if metrics:
+            metrics.update(stream_fallback=True)
+        return _convert_whole(src, in_fmt, dst, out_fmt, metrics, progress, csv_profile, selection)
+    if metrics:
+        total = time.perf_counter() - started
+        metrics.add_stage("parse", parse_seconds, bytes_in=os.path.getsize(src), streamed=True)
+        metrics.add_stage("write", total - parse_seconds, bytes_out=os.path.getsize(dst), streamed=True)
+        metrics.update(rows=rows, cols=cols)
+    return rows
+
+def _convert_whole(src, in_fmt, dst, out_fmt, metrics=None, progress=None, csv_profile=None, selection=None):
+    metrics = metrics or OperationMetrics("CONVERT", src)
+    with metrics.stage("parse", bytes_in=os.path.getsize(src)):
+        df = ensure_dataframe(read_data(src, in_fmt, progress=progress.read if progress else None,
+                                        csv_profile=csv_profile, selection=selection))
+    with metrics.stage("write"):
+        save_data(df, dst, out_fmt, progress.write if progress else None)
+    rows, cols = frame_shape(df)
+    metrics.update(rows=rows, cols=cols)
+    return rows
+
+def flush_to_disk(paths):
+    """Принудительно сбрасывает записанные файлы на диск (fsync), чтобы измерить дисковый ввод-вывод."""
+    for path in paths:
+        with open(path, "ab") as f:
+            os.fsync(f.fileno())
+
+def ensure_dataframe(data):
+    """Приводит прочитанные данные к DataFrame (книга листов остаётся словарём) или выбрасывает TypeError."""
+    if isinstance(data, pd.DataFrame) or is_workbook(data):
+        return data
+    df = _normalize_data_to_df(data)
+    if not isinstance(df, pd.DataFrame):
+        raise TypeError("Не удалось привести структуру данных к табличному виду для сохранения.")
+    return df
+
+# --- Оптимизация типов данных ---
+CATEGORY_RATIO = 0.5
+
+def _arrow_string_dtype():
+    """pandas 3 сам хранит строки в pyarrow (dtype "str"), в pandas 2 такой тип нужно запросить явно."""
+    return "str" if int(pd.__version__.split(".")[0]) >= 3 else "string[pyarrow]"
+
+def frame_memory(df):
+    """Объём памяти DataFrame (или книги листов) в байтах с учётом содержимого строк."""
+    if is_workbook(df):
+        return sum(frame_memory(sheet) for sheet in df.values())
+    return int(df.memory_usage(deep=True).sum())
+
+def _optimize_column(series, category_ratio):
+    kind = series.dtype.kind
+    if kind in "iu":
+        # Понижение разрядности целых без потерь: int64 -> int8/int16/uint8...
+        signed = not series.size or series.min() < 0
+        return pd.to_numeric(series, downcast="integer" if signed else "unsigned")
+    if kind == "f":
+        # float32 только если все значения представимы точно, иначе вывод изменился бы
+        narrow = series.astype("float32")
+        return narrow if narrow.astype(series.dtype).equals(series) else series
+    if (not pd.api.types.is_string_dtype(series.dtype)
+            or pd.api.types.infer_dtype(series, skipna=True) != "string"):
+        return series
+    if series.nunique() / series.size < category_ratio:
+        return series.astype("category")
+    if ARROW_AVAILABLE and series.dtype == object:
+        return series.astype(_arrow_string_dtype())
+    return series
+
+def optimize_dtypes(df, category_ratio=CATEGORY_RATIO):
+    """Уменьшает память DataFrame: понижает разрядность чисел, повторяющиеся строки
+    переводит в category, остальные строки — в строковый тип на pyarrow (если установлен).
+
+    Значения не меняются, поэтому результат сохраняется в любой формат так же, как исходный.
+    """
+    if is_workbook(df):
+        return {name: optimize_dtypes(sheet, category_ratio) for name, sheet in df.items()}
+    if not isinstance(df, pd.DataFrame):
+        return df
+    return pd.DataFrame({col: _optimize_column(df[col], category_ratio) for col in df.columns},
+                        index=df.index) if df.columns.is_unique else df
+
+def format_memory(before, after):
+    """«120.5 МБ → 31.2 МБ (−74%)» для строки статуса и панели просмотра."""
+    saved = (1 - after / before) * 100 if before else 0.0
+    return f"{before / (1024 * 1024):.1f} МБ → {after / (1024 * 1024):.1f} МБ (−{saved:.0f}%)"
 
 def save_code(content, out_path):
+    if isinstance(content, TextLines):
+        content.copy_to(out_path)
+        return
     with open(out_path, "w", encoding="utf-8") as f:
         f.writelines(content)
 
 # --- Функции определения формата ---
-def detect_format(filepath):
+EXTENSION_FORMATS = {
+    ".csv": "csv", ".xlsx": "xlsx", ".json": "json", ".jsonl": "jsonl", ".ndjson": "jsonl", ".xml": "xml",
+    ".parquet": "parquet", ".pq": "parquet", ".feather": "feather", ".ftr": "feather",
+    ".arrow": "arrow", ".arrows": "arrow", ".ipc": "arrow",
+    ".yaml": "yaml", ".yml": "yaml", ".ini": "ini", ".txt": "txt",
+    ".md": "md", ".markdown": "md"
+}
+SNIFF_BYTES = 8192
+
+# Сигнатуры двоичных форматов: (префикс, формат, уверенность)
+MAGIC_SIGNATURES = [
+    (b"PK\x03\x04", "xlsx", 0.6),
+    (b"PAR1", "parquet", 0.95),
+    (b"ARROW1", "arrow", 0.95),
+    (b"FEA1", "feather", 0.9),
+]
+# Метки порядка байтов; UTF-32 проверяется раньше UTF-16, т.к. начинается так же
+BOM_ENCODINGS = [
+    (b"\xef\xbb\xbf", "utf-8-sig"),
+    (b"\xff\xfe\x00\x00", "utf-32-le"), (b"\x00\x00\xfe\xff", "utf-32-be"),
+    (b"\xff\xfe", "utf-16-le"), (b"\xfe\xff", "utf-16-be"),
+]
+CSV_DELIMITERS = [",", ";", "\t", "|"]
+
+_XML_START = re.compile(r"<[A-Za-z_][\w.:-]*[\s/>]")
+_INI_SECTION = re.compile(r"^\[[^\[\]{}\"\n]+\]$")
+_INI_PAIR = re.compile(r"^[^=:\s\[][^=:]*[=:]")
+_YAML_PAIR = re.compile(r"^[\w\"'][^:#]*:(\s|$)")
+_MD_TABLE_RULE = re.compile(r"^\|?\s*:?-{3,}:?\s*(\|\s*:?-{3,}:?\s*)*\|?$")
+
+class FormatGuess:
+    """Результат определения формата: формат, уверенность 0..1, кодировка и разделитель CSV."""
+
+    __slots__ = ("format", "confidence", "encoding", "delimiter")
+
+    def __init__(self, fmt, confidence, encoding=None, delimiter=None):
+        self.format = fmt
+        self.confidence = confidence
+        self.encoding = encoding
+        self.delimiter = delimiter
+
+    def __repr__(self):
+        return (f"FormatGuess({self.format!r}, {self.confidence:.2f}, "
+                f"encoding={self.encoding!r}, delimiter={self.delimiter!r})")
+
+def _decode_head(head):
+    """Определяет кодировку по BOM или пробному декодированию; возвращает (кодировка, текст)."""
+    for bom, encoding in BOM_ENCODINGS:
+        if head.startswith(bom):
+            return encoding, head.decode(encoding, errors="ignore")
+    try:
+        return "utf-8", head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # Многобайтный символ, обрезанный границей буфера, — не повод отказываться от UTF-8
+        if e.start >= len(head) - 3:
+            return "utf-8", head[:e.start].decode("utf-8")
+    try:
+        return "cp1251", head.decode("cp1251")
+    except UnicodeDecodeError:
+        return "latin-1", head.decode("latin-1")
+
+def _significant_lines(text, complete, limit=50, comments="#;"):
+    """Непустые строки без комментариев; последняя строка отбрасывается, если буфер обрезан."""
+    lines = text.splitlines()
+    if not complete and lines:
+        lines = lines[:-1]
+    result = []
+    for line in lines:
+        stripped = line.strip()
+        if stripped and stripped[0] not in comments:
+            result.append(stripped)
+            if len(result) >= limit:
+                break
+    return result
+
+def _sniff_json(text, complete):
+    if text[0] not in "{[":
+        return None
+    if complete:
+        try:
+            json.loads(text)
+            return 0.99
+        except ValueError:
+            return None
+    # Файл длиннее буфера: достаточно, чтобы разбирался первый элемент массива или начало объекта
+    decoder = json.JSONDecoder()
+    if text[0] == "[":
+        body = text[1:].lstrip()
+        if not body or body[0] == "]":
+            return 0.9
+        try:
+            decoder.raw_decode(body)
+            return 0.9
+        except ValueError:
+            return None
+    return 0.85 if re.match(r'\{\s*("|\})', text) else None
+
+def _sniff_jsonl(lines):
+    """JSON Lines: каждая полная строка — отдельный JSON-объект или массив."""
+    if len(lines) < 2 or lines[0][0] not in "{[":
+        return None
+    for line in lines:
+        try:
+            json.loads(line)
+        except ValueError:
+            return None
+    return 0.95
+
+def _sniff_xml(text):
+    if text.startswith("<?xml"):
+        return 0.99
+    if _XML_START.match(text):
+        return 0.8
+    return None
+
+def _sniff_ini(lines):
+    if not lines or not _INI_SECTION.match(lines[0]):
+        return None
+    body = lines[1:]
+    if not body:
+        return 0.6
+    share = sum(1 for line in body if _INI_SECTION.match(line) or _INI_PAIR.match(line)) / len(body)
+    return 0.9 * share if share >= 0.8 else None
+
+def _sniff_md(lines):
+    if len(lines) >= 2 and lines[0].startswith("|") and _MD_TABLE_RULE.match(lines[1]):
+        return 0.9
+    if lines and lines[0].startswith("#") and lines[0].lstrip("#").startswith(" "):
+        return 0.5
+    return None
+
+def _sniff_yaml(lines, text):
+    if text.startswith("---"):
+        return 0.9
+    if not lines:
+        return None
+    share = sum(1 for line in lines if _YAML_PAIR.match(line) or line.startswith("- ")) / len(lines)
+    return 0.75 * share if share >= 0.8 else None
+
+def _is_number(text):
+    try:
+        float(text)
+    except ValueError:
+        return False
+    return True
+
+def _sniff_csv(lines):
+    """Подбирает разделитель, дающий одинаковое (>1) число полей во всех строках."""
+    if not lines:
+        return None, None
+    best = (None, None)
+    for delimiter in CSV_DELIMITERS:
+        if delimiter not in lines[0]:
+            continue
+        try:
+            rows = list(csv.reader(lines, delimiter=delimiter))
+        except csv.Error:
+            continue
+        widths = {len(row) for row in rows}
+        if len(widths) != 1 or widths.pop() < 2:
+            continue
+        # Проза с одной запятой в строке тоже даёт ровные два поля, поэтому выше
+        # обычного текста CSV ставится только при трёх и более строках, где
+        # разделителей больше одного или есть числовые либо кавычные поля
+        structured = len(rows[0]) > 2 or any('"' in line for line in lines) or any(
+            _is_number(field) for row in rows for field in row)
+        confidence = 0.85 if len(rows) >= 3 and structured else 0.08
+        if best[0] is None or confidence > best[0]:
+            best = (confidence, delimiter)
+    return best
+
+def sniff_format(filepath, head_size=SNIFF_BYTES):
+    """Определяет формат по содержимому за одно чтение начала файла.
+
+    Возвращает непустой список FormatGuess, упорядоченный по убыванию уверенности;
+    "txt" присутствует в нём всегда как запасной вариант.
+    """
+    with open(filepath, "rb") as f:
+        head = f.read(head_size)
+        complete = not f.read(1)
+    guesses = []
+    for magic, fmt, confidence in MAGIC_SIGNATURES:
+        if head.startswith(magic):
+            # Книга Excel — ZIP с [Content_Types].xml и каталогом xl/
+            if fmt == "xlsx" and (b"[Content_Types].xml" in head or b"xl/" in head):
+                confidence = 0.95
+            return [FormatGuess(fmt, confidence), FormatGuess("txt", 0.01)]
+    encoding, text = _decode_head(head)
+    if "\x00" in text:
+        return [FormatGuess("txt", 0.05, encoding)]
+    text = text.strip()
+    if not text:
+        return [FormatGuess("txt", 0.1, encoding)]
+
+    lines = _significant_lines(text, complete)
+    candidates = [
+        ("json", _sniff_json(text, complete)),
+        ("jsonl", _sniff_jsonl(_significant_lines(text, complete, limit=20, comments=""))),
+        ("xml", _sniff_xml(text)),
+        ("ini", _sniff_ini(lines)),
+        ("md", _sniff_md(_significant_lines(text, complete, comments=""))),
+        ("yaml", _sniff_yaml(lines, text)),
+    ]
+    for fmt, confidence in candidates:
+        if confidence:
+            guesses.append(FormatGuess(fmt, confidence, encoding))
+    csv_confidence, delimiter = _sniff_csv(_significant_lines(text, complete, comments=""))
+    if csv_confidence:
+        guesses.append(FormatGuess("csv", csv_confidence, encoding, delimiter))
+    guesses.append(FormatGuess("txt", 0.1, encoding))
+    guesses.sort(key=lambda g: g.confidence, reverse=True)
+    return guesses
+
+def detect_format_details(filepath):
+    """Лучшая догадка о формате: по расширению, а без известного расширения — по содержимому."""
     ext = os.path.splitext(filepath)[-1].lower()
-    if ext in SOURCE_EXTS: return "code"
-    if ext == ".csv": return "csv"
-    if ext == ".xlsx": return "xlsx"
-    if ext == ".json": return "json"
-    if ext == ".xml": return "xml"
-    if ext in [".yaml", ".yml"]: return "yaml"
-    if ext == ".ini": return "ini"
-    if ext == ".txt": return "txt"
-    if ext in [".md", ".markdown"]: return "md"
-
+    if ext in SOURCE_EXTS: return FormatGuess("code", 1.0)
+    if ext in EXTENSION_FORMATS: return FormatGuess(EXTENSION_FORMATS[ext], 1.0)
     try:
-        with open(filepath, "r", encoding="utf-8") as f:
-            head = f.read(2048).strip()
-            if head.startswith("{"):
-                try: json.loads(head); return "json"
-                except json.JSONDecodeError: pass
-            if head.startswith("<"):
-                try: ET.fromstring(head); return "xml"
-                except ET.ParseError: pass
-            try: yaml.safe_load(head); return "yaml"
-            except (yaml.YAMLError, AttributeError): pass
-            if "[" in head and "]" in head:
-                cp = configparser.ConfigParser()
-                try: cp.read_string(head); return "ini"
-                except configparser.Error: pass
-    except Exception:
-        pass
-    return "txt"
+        return sniff_format(filepath)[0]
+    except OSError:
+        return FormatGuess("txt", 0.0)
+
+def detect_format(filepath):
+    return detect_format_details(filepath).format
 
 def get_pretty_format(filepath, fmt):
     if fmt == "code":
@@ -323,6 +2732,712 @@ def get_pretty_format(filepath, fmt):
         return CODE_NAMES.get(ext, f"{ext[1:]} code" if ext.startswith('.') else "code")
     return fmt
 
+# --- Пакетная конвертация ---
+_WORKER_CACHES = {}
+
+def _worker_cache(cache_settings):
+    """Кэш разбора рабочего процесса; создаётся один раз на процесс и набор настроек."""
+    if not cache_settings:
+        return None
+    key = tuple(sorted(cache_settings.items()))
+    if key not in _WORKER_CACHES:
+        _WORKER_CACHES[key] = ParseCache(**cache_settings)
+    return _WORKER_CACHES[key]
+
+def convert_file(src, targets, chunksize=None, cache_settings=None, fsync=False, sheets=None, optimize=False,
+                 progress=False, csv_profile=None, selection=None):
+    """Конвертирует один файл в один или несколько форматов (targets — пары (путь, формат)).
+
+    Выполняется в процессе пула, поэтому возвращает словарь-результат
+    с поэтапными метриками в ключе "metrics". При progress долгие чтение и запись
+    раз в CLI_PROGRESS_INTERVAL секунд сообщают о ходе работы в stderr.
+    csv_profile задаёт чтение CSV-источников (см. build_csv_profile), selection — выборку
+    столбцов и строк (к исходному коду не применяется).
+    """
+    started = time.perf_counter()
+    metrics = OperationMetrics("BATCH_CONVERT", src)
+    tracker = None
+    if progress:
+        name = os.path.basename(src)
+        tracker = ProgressTracker(on_update=lambda t: print(f"  {name}: {t.text()}", file=sys.stderr, flush=True),
+                                  interval=CLI_PROGRESS_INTERVAL)
+    read_progress = tracker.read if tracker else None
+    write_progress = tracker.write if tracker else None
+    result = {"src": src, "outputs": [dst for dst, _ in targets], "status": "SUCCESS",
+              "rows": 0, "bytes": 0, "seconds": 0.0, "error": None, "source": None}
+    try:
+        # Подпись источника до чтения: по ней инкрементальный режим узнаёт неизменившиеся файлы
+        stat = os.stat(src)
+        result["source"] = [stat.st_size, stat.st_mtime_ns]
+        result["bytes"] = stat.st_size
+        with metrics.stage("detect"):
+            guess = detect_format_details(src)
+        fmt = guess.format
+        metrics.update(format=fmt, format_confidence=guess.confidence, encoding=guess.encoding,
+                       delimiter=guess.delimiter, targets=[out_fmt for _, out_fmt in targets])
+        if fmt == "code":
+            if any(out_fmt not in ["txt", "md"] for _, out_fmt in targets):
+                raise ValueError("Исходный код можно сохранять только как .txt или .md!")
+            with metrics.stage("parse", bytes_in=result["bytes"]):
+                data = read_data(src, fmt, progress=read_progress)
+            with metrics.stage("write"):
+                for dst, _ in targets:
+                    save_code(data, dst)
+            result["rows"] = len(data)
+            metrics.update(rows=len(data))
+        elif chunksize and len(targets) == 1 and is_streamable(fmt, targets[0][1]):
+            dst, out_fmt = targets[0]
+            result["rows"] = stream_convert(src, fmt, dst, out_fmt, chunksize, metrics, tracker, csv_profile,
+                                            selection)
+        else:
+            # Один разбор и общая предобработка на все целевые форматы
+            with metrics.stage("parse", bytes_in=result["bytes"]):
+                data = read_data(src, fmt, progress=read_progress, cache=_worker_cache(cache_settings),
+                                 sheets=sheets, csv_profile=csv_profile, selection=selection)
+            with metrics.stage("normalize"):
+                df = ensure_dataframe(data)
+            if optimize:
+                with metrics.stage("optimize"):
+                    memory_before = frame_memory(df)
+                    df = optimize_dtypes(df)
+                metrics.update(memory_before=memory_before, memory_after=frame_memory(df))
+            with metrics.stage("write"):
+                written = save_data_multi(df, targets, progress=write_progress)
+            failed = [(out_fmt, err) for _, out_fmt, err in written if err]
+            if failed:
+                raise RuntimeError("; ".join(f"{out_fmt}: {err}" for out_fmt, err in failed))
+            rows, cols = frame_shape(df)
+            result["rows"] = rows
+            metrics.update(rows=rows, cols=cols, sheets=len(df) if is_workbook(df) else 1)
+        if fsync:
+            with metrics.stage("flush"):
+                flush_to_disk(result["outputs"])
+        metrics.update(bytes_out=sum(os.path.getsize(dst) for dst in result["outputs"]))
+    except Exception as e:
+        result["status"] = "ERROR"
+        result["error"] = str(e)
+    result["seconds"] = time.perf_counter() - started
+    metrics.update(status=result["status"], error=result["error"])
+    result["metrics"] = metrics.to_dict()
+    return result
+
+def collect_batch_files(sources, out_dir, out_fmts, recursive=False, pattern=None):
+    """Строит список (исходный файл, [(файл назначения, формат), ...]) с сохранением структуры каталогов."""
+    def targets_for(rel):
+        return [(str(Path(out_dir) / rel.with_suffix(f".{out_fmt}")), out_fmt) for out_fmt in out_fmts]
+
+    tasks = []
+    for source in sources:
+        source = Path(source)
+        if source.is_dir():
+            files = source.rglob("*") if recursive else source.iterdir()
+            for path in sorted(p for p in files if p.is_file()):
+                if pattern and not fnmatch.fnmatch(path.name, pattern):
+                    continue
+                tasks.append((str(path), targets_for(path.relative_to(source))))
+        elif source.is_file():
+            tasks.append((str(source), targets_for(Path(source.name))))
+        else:
+            raise FileNotFoundError(f"Источник не найден: {source}")
+    return tasks
+
+MANIFEST_NAME = ".ffconverter_manifest.json"
+
+class ConversionManifest:
+    """Манифест инкрементальной конвертации: файл результата → источник и параметры, из которых он получен.
+
+    Конвертация пропускается, если у источника те же размер и mtime (или, при изменившемся
+    mtime, то же содержимое по хэшу), параметры совпадают, а результат не трогали после записи.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = {}
+        self._digests = {}
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.entries = json.load(f).get("outputs", {})
+            except (ValueError, AttributeError):
+                self.entries = {}  # повреждённый манифест равносилен полной конвертации
+
+    def _digest(self, src):
+        if src not in self._digests:
+            self._digests[src] = file_digest(src)
+        return self._digests[src]
+
+    def is_current(self, src, dst, options):
+        entry = self.entries.get(os.path.abspath(dst))
+        if not entry or entry["src"] != os.path.abspath(src) or entry["options"] != options:
+            return False
+        if _file_signature(dst) != tuple(entry["output"]):
+            return False
+        signature = _file_signature(src)
+        if signature is None:
+            return False
+        if signature == tuple(entry["source"]):
+            return True
+        # mtime изменился без изменения размера (копирование, touch) — сверяем содержимое
+        if signature[0] == entry["source"][0] and entry.get("digest") == self._digest(src):
+            entry["source"] = list(signature)
+            return True
+        return False
+
+    def filter_tasks(self, tasks, options_for):
+        """Оставляет только цели, которые нужно пересобрать; возвращает (задачи, число пропущенных целей)."""
+        pending, skipped = [], 0
+        for src, targets in tasks:
+            stale = [(dst, fmt) for dst, fmt in targets if not self.is_current(src, dst, options_for(fmt))]
+            skipped += len(targets) - len(stale)
+            if stale:
+                pending.append((src, stale))
+        return pending, skipped
+
+    def record(self, results, tasks, options_for):
+        formats = {dst: fmt for _, targets in tasks for dst, fmt in targets}
+        for res in results:
+            for dst in res["outputs"]:
+                key = os.path.abspath(dst)
+                output = _file_signature(dst)
+                if res["status"] != "SUCCESS" or output is None:
+                    self.entries.pop(key, None)
+                    continue
+                self.entries[key] = {
+                    "src": os.path.abspath(res["src"]),
+                    "source": res["source"],
+                    "digest": self._digest(res["src"]),
+                    "options": options_for(formats[dst]),
+                    "output": list(output),
+                }
+
+    def save(self):
+        """Атомарная запись: прерванный запуск не оставляет обрезанный манифест."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump({"version": 1, "outputs": self.entries}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp_path, self.path)
+
+def _batch_results(tasks, jobs, *args):
+    if len(tasks) == 1:
+        # Единственный файл конвертируется в текущем процессе, чтобы листы XLSX можно было читать параллельно
+        src, targets = tasks[0]
+        yield convert_file(src, targets, *args)
+        return
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(convert_file, src, targets, *args) for src, targets in tasks]
+        for future in as_completed(futures):
+            yield future.result()
+
+def _task_bytes(src):
+    try:
+        return os.path.getsize(src)
+    except OSError:
+        return 0
+
+def run_batch(tasks, jobs=None, logger=None, echo=print, chunksize=None, cache_settings=None, fsync=False,
+              sheets=None, optimize=False, progress=False, csv_profile=None, selection=None):
+    """Распределяет конвертацию по пулу процессов и возвращает список результатов.
+
+    При progress после каждого файла выводится общий прогресс пакета с оценкой
+    оставшегося времени по скорости обработки байтов.
+    """
+    for _, targets in tasks:
+        for dst, _ in targets:
+            os.makedirs(os.path.dirname(dst) or ".", exist_ok=True)
+
+    started = time.perf_counter()
+    results = []
+    total_bytes = sum(_task_bytes(src) for src, _ in tasks) if progress else 0
+    done_bytes = 0
+    for res in _batch_results(tasks, jobs, chunksize, cache_settings, fsync, sheets, optimize, progress,
+                              csv_profile, selection):
+        results.append(res)
+        if logger:
+            logger.log_operation("BATCH_CONVERT", res["src"], res["status"], res["error"])
+            logger.log_metrics(res["metrics"])
+        if res["status"] == "SUCCESS":
+            memory = res["metrics"].get("memory_after")
+            memory = f", память {format_memory(res['metrics']['memory_before'], memory)}" if memory else ""
+            echo(f"[OK]    {res['src']} -> {', '.join(res['outputs'])} "
+                 f"({res['rows']} строк, {res['seconds']:.2f} с{memory})")
+        else:
+            echo(f"[ERROR] {res['src']}: {res['error']}")
+        if progress and len(tasks) > 1 and len(results) < len(tasks):
+            done_bytes += res["bytes"] or _task_bytes(res["src"])
+            echo(_batch_progress_text(len(results), len(tasks), done_bytes, total_bytes,
+                                      time.perf_counter() - started))
+    elapsed = time.perf_counter() - started
+
+    ok = [r for r in results if r["status"] == "SUCCESS"]
+    total_rows = sum(r["rows"] for r in ok)
+    total_mb = sum(r["bytes"] for r in ok) / (1024 * 1024)
+    speed = elapsed if elapsed > 0 else 1e-9
+    echo(f"Готово: {len(ok)} успешно, {len(results) - len(ok)} с ошибками за {elapsed:.2f} с "
+         f"({len(results) / speed:.1f} файлов/с, {total_rows / speed:,.0f} строк/с, {total_mb / speed:.2f} МБ/с)")
+    return results
+
+def _batch_progress_text(done, total, done_bytes, total_bytes, elapsed):
+    """«Прогресс: 3/10 файлов, 120.0 из 400.0 МБ, 35.2 МБ/с, осталось ~8 с»."""
+    mb = 1024 * 1024
+    text = f"Прогресс: {done}/{total} файлов, {done_bytes / mb:.1f} из {total_bytes / mb:.1f} МБ"
+    if elapsed > 0 and done_bytes:
+        rate = done_bytes / elapsed
+        text += f", {rate / mb:.1f} МБ/с, осталось ~{format_duration(max(total_bytes - done_bytes, 0) / rate)}"
+    return text
+
+# --- Наблюдение за каталогами ---
+class WatchRule:
+    """Правило из секции [WATCH:имя]: откуда брать файлы, куда и в какие форматы сохранять."""
+
+    def __init__(self, name, input_dir, output_dir, formats, pattern="*", recursive=False):
+        self.name = name
+        self.input_dir = Path(input_dir).resolve()
+        self.output_dir = Path(output_dir).resolve()
+        self.formats = formats
+        self.pattern = pattern
+        self.recursive = recursive
+
+    def matches(self, path, ignore):
+        path = Path(path)
+        if not fnmatch.fnmatch(path.name, self.pattern):
+            return False
+        if any(fnmatch.fnmatch(path.name, mask) for mask in ignore):
+            return False
+        try:
+            rel = path.relative_to(self.input_dir)
+        except ValueError:
+            return False
+        # Результаты, сохранённые внутрь наблюдаемого каталога, не должны конвертироваться повторно;
+        # если каталоги совпадают, результаты отсекаются по расширению
+        if path.is_relative_to(self.output_dir):
+            if self.output_dir != self.input_dir or path.suffix.lower().lstrip(".") in self.formats:
+                return False
+        return self.recursive or len(rel.parts) == 1
+
+    def targets(self, path):
+        rel = Path(path).relative_to(self.input_dir)
+        return [(str(self.output_dir / rel.with_suffix(f".{fmt}")), fmt) for fmt in self.formats]
+
+def load_watch_rules(config):
+    """Читает правила наблюдения из секций [WATCH:имя] файла settings.ini."""
+    rules = []
+    for section in config.sections("WATCH:"):
+        name = section.split(":", 1)[1]
+        try:
+            rules.append(WatchRule(
+                name,
+                config.get(section, 'input'),
+                config.get(section, 'output'),
+                parse_format_list(config.get(section, 'formats', '')),
+                config.get(section, 'pattern', '*'),
+                config.get(section, 'recursive', 'false') == 'true',
+            ))
+        except (TypeError, argparse.ArgumentTypeError) as e:
+            raise ValueError(f"Некорректное правило [{section}]: {e or 'не заданы input/output'}") from e
+    return rules
+
+class ConversionJournal:
+    """Журнал обработанных файлов (JSON Lines), переживающий перезапуск наблюдения.
+
+    Файл считается обработанным, если для того же правила, пути, размера и mtime
+    уже есть запись — успешная или с ошибкой; изменённый файл обрабатывается заново.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._done = set()
+        self._lock = threading.Lock()
+        if self.path.exists():
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                        self._done.add(self._key(entry["rule"], entry["src"], entry["size"], entry["mtime_ns"]))
+                    except (ValueError, KeyError):
+                        continue  # недописанная строка после аварийного завершения
+
+    @staticmethod
+    def _key(rule, src, size, mtime_ns):
+        return rule, src, size, mtime_ns
+
+    def is_done(self, rule, src, signature):
+        return self._key(rule, src, *signature) in self._done
+
+    def record(self, rule, src, signature, result):
+        entry = {"timestamp": datetime.now().isoformat(timespec="seconds"), "rule": rule, "src": src,
+                 "size": signature[0], "mtime_ns": signature[1], "status": result["status"],
+                 "outputs": result["outputs"], "error": result["error"]}
+        with self._lock:
+            self._done.add(self._key(rule, src, *signature))
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+                f.flush()
+                os.fsync(f.fileno())
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+class PollingWatcher:
+    """Периодический обход каталогов: работает везде, но реагирует с задержкой до interval."""
+
+    def __init__(self, rules, interval):
+        self.rules = rules
+        self.interval = interval
+
+    def poll(self, timeout):
+        time.sleep(min(timeout, self.interval))
+        return None  # None — пересканировать все каталоги
+
+    def close(self):
+        pass
+
+class InotifyWatcher:
+    """События файловой системы Linux (inotify) через ctypes, без сторонних зависимостей."""
+
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_ISDIR = 0x40000000
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self, rules):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        self.dirs = {}
+        for rule in rules:
+            self._watch_tree(rule.input_dir, rule.recursive)
+
+    def _watch_tree(self, directory, recursive):
+        self._watch(directory)
+        if recursive:
+            for sub in Path(directory).rglob("*"):
+                if sub.is_dir():
+                    self._watch(sub)
+
+    def _watch(self, directory):
+        wd = self._add_watch(self.fd, os.fsencode(str(directory)), self.MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch: {directory}")
+        self.dirs[wd] = Path(directory)
+
+    def poll(self, timeout):
+        """Возвращает множество изменившихся путей или None, если нужен полный обход."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        data = os.read(self.fd, 1 << 16)
+        changed, offset = set(), 0
+        while offset < len(data):
+            wd, mask, _, length = self.EVENT.unpack_from(data, offset)
+            raw_name = data[offset + self.EVENT.size:offset + self.EVENT.size + length]
+            offset += self.EVENT.size + length
+            if mask & self.IN_Q_OVERFLOW:
+                return None
+            directory = self.dirs.get(wd)
+            if directory is None:
+                continue
+            path = directory / os.fsdecode(raw_name.rstrip(b"\0"))
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    # Новый подкаталог: ставим наблюдение и обходим его содержимое, появившееся до этого
+                    self._watch_tree(path, True)
+                    return None
+                continue
+            changed.add(str(path))
+        return changed
+
+    def close(self):
+        os.close(self.fd)
+
+class FolderWatcher:
+    """Служба наблюдения: собирает изменения, выжидает стабилизации файлов и конвертирует их в пуле процессов."""
+
+    def __init__(self, rules, journal, logger=None, echo=print, jobs=None, debounce=2.0, poll_interval=1.0,
+                 ignore=(), use_inotify=True, convert_args=()):
+        self.rules = rules
+        self.journal = journal
+        self.logger = logger
+        self.echo = echo
+        self.jobs = jobs or os.cpu_count() or 1
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.ignore = ignore
+        self.convert_args = convert_args
+        self.pending = {}    # путь -> (правило, подпись, время последнего изменения)
+        self.in_flight = {}  # future -> (правило, путь, подпись)
+        self.isolated = set()  # файлы, бывшие в пуле при аварии рабочего процесса: конвертируются по одному
+        self.watcher = self._make_watcher(use_inotify)
+
+    def _make_watcher(self, use_inotify):
+        if use_inotify and sys.platform.startswith("linux"):
+            try:
+                return InotifyWatcher(self.rules)
+            except OSError as e:
+                self.echo(f"inotify недоступен ({e}), используется периодический обход")
+        return PollingWatcher(self.rules, self.poll_interval)
+
+    def _rule_for(self, path):
+        for rule in self.rules:
+            if rule.matches(path, self.ignore):
+                return rule
+        return None
+
+    def _scan(self):
+        for rule in self.rules:
+            files = rule.input_dir.rglob("*") if rule.recursive else rule.input_dir.iterdir()
+            for path in files:
+                if path.is_file():
+                    self._touch(str(path))
+
+    def _touch(self, path):
+        """Отмечает изменение файла; конвертация начнётся, когда он перестанет меняться."""
+        rule = self._rule_for(path)
+        signature = _file_signature(path)
+        if rule is None or signature is None:
+            self.pending.pop(path, None)
+            return
+        if self.journal.is_done(rule.name, path, signature):
+            return
+        previous = self.pending.get(path)
+        if previous is None or previous[1] != signature:
+            self.pending[path] = (rule, signature, time.monotonic())
+
+    def _submit_ready(self, pool):
+        now = time.monotonic()
+        busy = {src for _, src, _ in self.in_flight.values()}
+        limit = 1 if self.isolated else self.jobs * 2
+        for path, (rule, signature, changed_at) in list(self.pending.items()):
+            if len(self.in_flight) >= limit:
+                break  # ограниченная очередь: остальные файлы подождут в pending
+            if now - changed_at < self.debounce or path in busy or (self.isolated and path not in self.isolated):
+                continue
+            current = _file_signature(path)
+            if current != signature:
+                # Файл ещё дописывается — откладываем
+                self._touch(path)
+                continue
+            del self.pending[path]
+            if self.journal.is_done(rule.name, path, signature):
+                continue  # уже сконвертирован, пока ожидал в очереди
+            targets = rule.targets(path)
+            for dst, _ in targets:
+                os.makedirs(os.path.dirname(dst), exist_ok=True)
+            future = pool.submit(convert_file, path, targets, *self.convert_args)
+            self.in_flight[future] = (rule, path, signature)
+
+    def _collect(self):
+        """Разбирает завершившиеся конвертации; возвращает False, если пул сломан аварией рабочего процесса.
+
+        Авария (нехватка памяти, сбой C-читателя) завершает ошибкой все незаконченные задачи пула.
+        Если такая задача была одна, виноват её файл — он записывается в журнал с ошибкой, чтобы
+        после перезапуска не уронить службу снова. Иначе файлы возвращаются в очередь и
+        конвертируются по одному, пока виновник не найдётся.
+        """
+        done = [f for f in self.in_flight if f.done()]
+        broken = any(isinstance(f.exception(), BrokenProcessPool) for f in done)
+        if broken:
+            wait(self.in_flight)
+            done = list(self.in_flight)
+        crashed = []
+        for future in done:
+            rule, path, signature = self.in_flight.pop(future)
+            error = future.exception()
+            if isinstance(error, BrokenProcessPool):
+                crashed.append((rule, path, signature))
+                continue
+            self.isolated.discard(path)
+            self._report(rule, path, signature, future.result() if error is None else self._failed(rule, path, error))
+        if len(crashed) == 1:
+            rule, path, signature = crashed[0]
+            self.isolated.discard(path)
+            self._report(rule, path, signature,
+                         self._failed(rule, path, "рабочий процесс аварийно завершился при конвертации файла"))
+        else:
+            for rule, path, signature in crashed:
+                self.isolated.add(path)
+                self.pending.setdefault(path, (rule, signature, 0.0))
+        return not broken
+
+    @staticmethod
+    def _failed(rule, path, error):
+        return {"src": path, "outputs": [dst for dst, _ in rule.targets(path)], "status": "ERROR",
+                "rows": 0, "seconds": 0.0, "error": str(error), "metrics": None}
+
+    def _report(self, rule, path, signature, res):
+        self.journal.record(rule.name, path, signature, res)
+        if self.logger:
+            self.logger.log_operation("WATCH_CONVERT", path, res["status"], res["error"])
+            if res["metrics"]:
+                self.logger.log_metrics(res["metrics"])
+        if res["status"] == "SUCCESS":
+            self.echo(f"[OK]    [{rule.name}] {path} -> {', '.join(res['outputs'])} ({res['seconds']:.2f} с)")
+        else:
+            self.echo(f"[ERROR] [{rule.name}] {path}: {res['error']}")
+
+    def run(self, once=False):
+        """Основной цикл; при once=True завершается, когда все найденные файлы обработаны."""
+        self._scan()
+        pool = ProcessPoolExecutor(max_workers=self.jobs)
+        try:
+            while True:
+                self._submit_ready(pool)
+                if not self._collect():
+                    self.echo("Рабочий процесс аварийно завершился, пул процессов создан заново")
+                    pool.shutdown(wait=False)
+                    pool = ProcessPoolExecutor(max_workers=self.jobs)
+                    continue
+                if once and not self.pending and not self.in_flight:
+                    return
+                changed = self.watcher.poll(self.debounce / 2 if self.pending else self.poll_interval)
+                if changed is None:
+                    self._scan()
+                else:
+                    for path in changed:
+                        self._touch(path)
+        finally:
+            pool.shutdown()
+            self.watcher.close()
+
+# --- Бенчмарки ---
+BENCH_DTYPES = ["int", "float", "str", "bool", "datetime"]
+# По умолчанию без datetime: YAML не представляет Timestamp, и набор должен проходить через все форматы
+BENCH_DEFAULT_DTYPES = ["int", "float", "str", "bool"]
+
+def generate_benchmark_frame(rows, cols, dtypes=None, seed=0):
+    """Синтетический DataFrame: типы столбцов циклически берутся из dtypes."""
+    rng = np.random.default_rng(seed)
+    dtypes = dtypes or BENCH_DEFAULT_DTYPES
+    data = {}
+    for i in range(cols):
+        dtype = dtypes[i % len(dtypes)]
+        name = f"{dtype}_{i}"
+        if dtype == "int":
+            data[name] = rng.integers(-1_000_000, 1_000_000, rows)
+        elif dtype == "float":
+            data[name] = rng.normal(0, 1000, rows).round(4)
+        elif dtype == "str":
+            words = np.array(["alpha", "beta", "gamma", "delta", "омега", "x&y", "<tag>"])
+            data[name] = words[rng.integers(0, len(words), rows)] + rng.integers(0, 1000, rows).astype(str)
+        elif dtype == "bool":
+            data[name] = rng.integers(0, 2, rows).astype(bool)
+        elif dtype == "datetime":
+            data[name] = pd.Timestamp("2020-01-01") + pd.to_timedelta(rng.integers(0, 10**8, rows), unit="s")
+        else:
+            raise ValueError(f"Неизвестный тип столбца для бенчмарка: {dtype}")
+    return pd.DataFrame(data)
+
+def _bench_pair(src, in_fmt, dst, out_fmt):
+    """Один замер чтение→запись; выполняется в отдельном процессе ради честного пикового RSS."""
+    started = time.perf_counter()
+    df = ensure_dataframe(read_data(src, in_fmt))
+    read_done = time.perf_counter()
+    save_data(df, dst, out_fmt)
+    finished = time.perf_counter()
+    return {"rows": len(df), "read_seconds": read_done - started,
+            "write_seconds": finished - read_done, "seconds": finished - started,
+            "output_bytes": os.path.getsize(dst), "peak_rss_mb": peak_rss_mb()}
+
+def run_benchmark(rows=10000, cols=10, dtypes=None, inputs=None, outputs=None,
+                  repeat=1, workdir=None, echo=print):
+    """Замеряет все пары вход→выход и возвращает отчёт, пригодный для сохранения в JSON."""
+    inputs = inputs or [fmt for fmt in SUPPORTED_FORMATS if fmt in READERS]
+    outputs = outputs or [fmt for fmt in SUPPORTED_FORMATS if fmt in WRITERS]
+    temporary = workdir is None
+    workdir = Path(workdir or tempfile.mkdtemp(prefix="ffconverter_bench_"))
+    workdir.mkdir(parents=True, exist_ok=True)
+    try:
+        results = _run_benchmark_pairs(rows, cols, dtypes, inputs, outputs, repeat, workdir, echo)
+    finally:
+        if temporary:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        "meta": {"created": datetime.now().isoformat(timespec="seconds"), "rows": rows, "cols": cols,
+                 "dtypes": dtypes or BENCH_DEFAULT_DTYPES, "repeat": repeat, "python": sys.version.split()[0],
+                 "pandas": pd.__version__, "platform": sys.platform},
+        "results": results,
+    }
+
+def _bench_unsupported(error):
+    """Ожидаемый отказ: формат не может представить тип столбца (например, Timestamp в YAML)."""
+    return isinstance(error, yaml.representer.RepresenterError)
+
+def _bench_failure(in_fmt, out_fmt, error, stage=""):
+    """Запись отчёта о неудачной паре: "unsupported" для ожидаемых отказов, иначе "error"."""
+    return {"input": in_fmt, "output": out_fmt,
+            "unsupported" if _bench_unsupported(error) else "error": f"{stage}{error}"}
+
+def _run_benchmark_pairs(rows, cols, dtypes, inputs, outputs, repeat, workdir, echo):
+    df = generate_benchmark_frame(rows, cols, dtypes)
+    sources, results = {}, []
+    for in_fmt in inputs:
+        try:
+            sources[in_fmt] = workdir / f"source.{in_fmt}"
+            save_data(df, sources[in_fmt], in_fmt)
+        except Exception as e:
+            # Исходный файл в этом формате не создаётся — все его пары считаются ошибочными
+            del sources[in_fmt]
+            results.extend(_bench_failure(in_fmt, out_fmt, e, "подготовка источника: ") for out_fmt in outputs)
+            label = "НЕ ПОДДЕРЖИВАЕТСЯ" if _bench_unsupported(e) else "ОШИБКА"
+            echo(f"{in_fmt:>5} -> *     {label} подготовки источника: {e}")
+    del df
+
+    for in_fmt in inputs:
+        if in_fmt not in sources:
+            continue
+        src = sources[in_fmt]
+        input_bytes = os.path.getsize(src)
+        for out_fmt in outputs:
+            dst = workdir / f"result_{in_fmt}.{out_fmt}"
+            runs = []
+            try:
+                for _ in range(repeat):
+                    with ProcessPoolExecutor(max_workers=1) as pool:
+                        runs.append(pool.submit(_bench_pair, str(src), in_fmt, str(dst), out_fmt).result())
+            except Exception as e:
+                results.append(_bench_failure(in_fmt, out_fmt, e))
+                echo(f"{in_fmt:>5} -> {out_fmt:<5} {'НЕ ПОДДЕРЖИВАЕТСЯ' if _bench_unsupported(e) else 'ОШИБКА'}: {e}")
+                continue
+            best = min(runs, key=lambda r: r["seconds"])
+            seconds = best["seconds"] or 1e-9
+            entry = {"input": in_fmt, "output": out_fmt, "input_bytes": input_bytes,
+                     **best, "rows_per_sec": best["rows"] / seconds,
+                     "bytes_per_sec": input_bytes / seconds}
+            results.append(entry)
+            rss = f"{entry['peak_rss_mb']:.0f} МБ" if entry["peak_rss_mb"] is not None else "н/д"
+            echo(f"{in_fmt:>5} -> {out_fmt:<5} {entry['seconds']:8.3f} с "
+                 f"(чтение {entry['read_seconds']:.3f}, запись {entry['write_seconds']:.3f}) "
+                 f"{entry['rows_per_sec']:>12,.0f} строк/с {entry['bytes_per_sec'] / 1048576:8.2f} МБ/с  RSS {rss}")
+    return results
+
+def compare_benchmarks(old, new):
+    """Строки сравнения двух отчётов run_benchmark по времени каждой пары."""
+    old_index = {(r["input"], r["output"]): r for r in old.get("results", []) if "seconds" in r}
+    lines = []
+    old_meta, new_meta = old.get("meta", {}), new.get("meta", {})
+    if any(old_meta.get(k) != new_meta.get(k) for k in ("rows", "cols", "dtypes")):
+        lines.append("Внимание: отчёты построены на разных наборах данных (rows/cols/dtypes).")
+    for r in new.get("results", []):
+        before = old_index.get((r["input"], r["output"]))
+        if "seconds" not in r or not before:
+            continue
+        change = (r["seconds"] - before["seconds"]) / (before["seconds"] or 1e-9) * 100
+        lines.append(f"{r['input']:>5} -> {r['output']:<5} {before['seconds']:8.3f} с -> "
+                     f"{r['seconds']:8.3f} с ({change:+.1f}%)")
+    return lines
+
 # --- Окно настроек ---
 class SettingsWindow:
     def __init__(self, parent, config):
@@ -387,12 +3502,52 @@ class SettingsWindow:
         self.preview_lines_var = StringVar(value=self.config.get('GUI', 'preview_lines'))
         ttk.Spinbox(parent, from_=5, to=100, textvariable=self.preview_lines_var, width=10).pack(anchor="w")
 
+        # Параллельные задачи очереди
+        Label(parent, text="Одновременных задач в очереди:", bg=BG_SEC, fg=TXT_ACCENT).pack(anchor="w", pady=(15,5))
+        self.max_jobs_var = StringVar(value=self.config.get('GUI', 'max_jobs', '2'))
+        ttk.Spinbox(parent, from_=1, to=16, textvariable=self.max_jobs_var, width=10).pack(anchor="w")
+
     def create_processing_settings(self, parent):
         # Максимальный размер файла
         Label(parent, text="Максимальный размер файла (МБ):", bg=BG_SEC, fg=TXT_ACCENT).pack(anchor="w", pady=5)
         self.max_size_var = StringVar(value=self.config.get('PROCESSING', 'max_file_size_mb'))
         ttk.Entry(parent, textvariable=self.max_size_var, width=10).pack(anchor="w")
 
+        # Размер чанка для потоковой обработки больших файлов
+        Label(parent, text="Размер чанка (строк) для больших файлов:", bg=BG_SEC, fg=TXT_ACCENT).pack(anchor="w", pady=(15,5))
+        self.chunk_size_var = StringVar(value=self.config.get('PROCESSING', 'chunk_size', '50000'))
+        ttk.Entry(parent, textvariable=self.chunk_size_var, width=10).pack(anchor="w")
+
+        # Листы XLSX для чтения
+        Label(parent, text="Листы XLSX через запятую (пусто — первый, * — все):", bg=BG_SEC, fg=TXT_ACCENT).pack(anchor="w", pady=(15,5))
+        self.xlsx_sheets_var = StringVar(value=self.config.get('PROCESSING', 'xlsx_sheets', ''))
+        ttk.Entry(parent, textvariable=self.xlsx_sheets_var, width=30).pack(anchor="w")
+
+        # Профиль чтения CSV
+        Label(parent, text="CSV: движок, кодировка, разделитель (auto — определять):", bg=BG_SEC, fg=TXT_ACCENT).pack(anchor="w", pady=(15,5))
+        csv_frame = Frame(parent, bg=BG_SEC)
+        csv_frame.pack(anchor="w")
+        self.csv_engine_var = StringVar(value=self.config.get('CSV', 'engine', 'c'))
+        ttk.Combobox(csv_frame, textvariable=self.csv_engine_var, values=CSV_ENGINES, width=8,
+                     state="readonly").pack(side="left")
+        self.csv_encoding_var = StringVar(value=self.config.get('CSV', 'encoding', 'auto'))
+        ttk.Combobox(csv_frame, textvariable=self.csv_encoding_var, values=["auto", "utf-8", "cp1251", "latin-1"],
+                     width=10).pack(side="left", padx=5)
+        self.csv_delimiter_var = StringVar(value=self.config.get('CSV', 'delimiter', 'auto'))
+        ttk.Combobox(csv_frame, textvariable=self.csv_delimiter_var, values=["auto", ",", ";", "tab", "|"],
+                     width=6).pack(side="left")
+
+        # Кэш разбора
+        self.cache_var = BooleanVar(value=self.config.get('CACHE', 'enabled', 'true') == 'true')
+        ttk.Checkbutton(parent, text=f"Кэшировать результаты разбора файлов (до "
+                        f"{self.config.get('CACHE', 'disk_budget_mb', '2048')} МБ в каталоге пользователя)",
+                        variable=self.cache_var).pack(anchor="w", pady=(10,0))
+
+        # Сжатие типов столбцов после загрузки
+        self.optimize_var = BooleanVar(value=self.config.get('PROCESSING', 'optimize_dtypes', 'false') == 'true')
+        ttk.Checkbutton(parent, text="Оптимизировать типы данных (экономия памяти)",
+                        variable=self.optimize_var).pack(anchor="w", pady=(10,0))
+
         # Включить валидацию
         self.validation_var = BooleanVar(value=self.config.get('PROCESSING', 'enable_validation') == 'true')
         ttk.Checkbutton(parent, text="Включить валидацию файлов", variable=self.validation_var).pack(anchor="w", pady=10)
@@ -407,15 +3562,148 @@ class SettingsWindow:
         self.config.set('GUI', 'window_height', self.height_var.get())
         self.config.set('GUI', 'font_size', self.font_size_var.get())
         self.config.set('GUI', 'preview_lines', self.preview_lines_var.get())
+        self.config.set('GUI', 'max_jobs', self.max_jobs_var.get())
 
         # Сохранение настроек обработки
         self.config.set('PROCESSING', 'max_file_size_mb', self.max_size_var.get())
+        self.config.set('PROCESSING', 'chunk_size', self.chunk_size_var.get())
+        self.config.set('PROCESSING', 'xlsx_sheets', self.xlsx_sheets_var.get())
+        self.config.set('CSV', 'engine', self.csv_engine_var.get())
+        self.config.set('CSV', 'encoding', self.csv_encoding_var.get())
+        self.config.set('CSV', 'delimiter', self.csv_delimiter_var.get())
         self.config.set('PROCESSING', 'enable_validation', str(self.validation_var.get()).lower())
         self.config.set('PROCESSING', 'show_progress', str(self.progress_var.get()).lower())
+        self.config.set('PROCESSING', 'optimize_dtypes', str(self.optimize_var.get()).lower())
+        self.config.set('CACHE', 'enabled', str(self.cache_var.get()).lower())
 
         messagebox.showinfo("Настройки", "Настройки сохранены! Перезапустите приложение для применения некоторых изменений.")
         self.window.destroy()
 
+# --- Очередь задач GUI ---
+JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_ERROR, JOB_CANCELLED = "queued", "running", "done", "error", "cancelled"
+JOB_STATUS_LABELS = {
+    JOB_QUEUED: "В очереди", JOB_RUNNING: "Выполняется", JOB_DONE: "Готово",
+    JOB_ERROR: "Ошибка", JOB_CANCELLED: "Отменено",
+}
+JOB_FINISHED = (JOB_DONE, JOB_ERROR, JOB_CANCELLED)
+# Период опроса очереди из главного потока Tk, мс
+JOB_POLL_MS = 200
+# Задержка перед фоновым импортом тяжёлых модулей после показа окна, мс
+PRELOAD_DELAY_MS = 300
+
+class JobCancelled(Exception):
+    """Задача отменена: выбрасывается в рабочем потоке в ближайшей контрольной точке."""
+
+class Job:
+    """Задача очереди: func(job, *args) выполняется в рабочем потоке.
+
+    Поток пишет в задачу только простые поля (статус, прогресс, результат), а GUI читает их при опросе.
+    Отмена кооперативная: callbacks job.progress и checkpoint() выбрасывают JobCancelled.
+    """
+
+    _ids = count(1)
+
+    def __init__(self, title, src, func, args=(), on_done=None):
+        self.id = next(Job._ids)
+        self.title = title
+        self.src = src
+        self.func = func
+        self.args = args
+        self.on_done = on_done
+        self.status = JOB_QUEUED
+        self.progress = ProgressTracker(check=self.checkpoint)
+        self.result = None
+        self.error = None
+        self.details = None
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def checkpoint(self):
+        if self._cancel.is_set():
+            raise JobCancelled()
+
+    def elapsed(self):
+        if self.started is None:
+            return 0.0
+        return (self.finished or time.perf_counter()) - self.started
+
+    def clone(self):
+        """Новая задача с теми же параметрами — для повтора."""
+        return Job(self.title, self.src, self.func, self.args, self.on_done)
+
+class JobManager:
+    """Пул рабочих потоков для задач GUI.
+
+    Завершённые задачи складываются в очередь и забираются главным потоком через poll(),
+    поэтому рабочие потоки никогда не обращаются к Tk.
+    """
+
+    def __init__(self, workers=2):
+        self.jobs = OrderedDict()
+        self._done = queue.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="ffconverter-job")
+
+    def submit(self, job):
+        self.jobs[job.id] = job
+        self._pool.submit(self._run, job)
+        return job
+
+    def _run(self, job):
+        try:
+            job.checkpoint()
+            job.started = time.perf_counter()
+            job.status = JOB_RUNNING
+            job.result = job.func(job, *job.args)
+            job.status = JOB_DONE
+        except JobCancelled:
+            job.status = JOB_CANCELLED
+        except Exception as e:
+            job.error = str(e)
+            job.details = traceback.format_exc()
+            job.status = JOB_ERROR
+        job.finished = time.perf_counter()
+        self._done.put(job)
+
+    def cancel(self, job_id):
+        job = self.jobs.get(job_id)
+        if job and job.status not in JOB_FINISHED:
+            job.cancel()
+
+    def retry(self, job_id):
+        job = self.jobs.get(job_id)
+        if job and job.status in (JOB_ERROR, JOB_CANCELLED):
+            return self.submit(job.clone())
+        return None
+
+    def clear_finished(self):
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.status in JOB_FINISHED]:
+            del self.jobs[job_id]
+
+    def poll(self):
+        """Задачи, завершившиеся с прошлого вызова (вызывается из главного потока)."""
+        finished = []
+        while True:
+            try:
+                finished.append(self._done.get_nowait())
+            except queue.Empty:
+                return finished
+
+    def active(self):
+        return sum(1 for job in self.jobs.values() if job.status not in JOB_FINISHED)
+
+    def shutdown(self):
+        for job in self.jobs.values():
+            job.cancel()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
 # --- GUI Класс ---
 class DataConverterGUI:
     def __init__(self, master):
@@ -425,6 +3713,7 @@ class DataConverterGUI:
         self.config = AppConfig()
         self.logger = AppLogger()
         self.validator = DataValidator()
+        self.cache = ParseCache.from_config(self.config)
 
         # Настройка окна
         window_width = self.config.get('GUI', 'window_width', '950')
@@ -438,10 +3727,25 @@ class DataConverterGUI:
         self.file_path = ""
         self.in_format = StringVar()
         self.out_format = StringVar()
+        # Выборка при конвертации: столбцы, условие отбора строк и лимит
+        self.select_columns = StringVar()
+        self.select_where = StringVar()
+        self.select_limit = StringVar()
         self.status = StringVar(value="Готов к работе.")
         self.data_content = None
         self.n_preview = IntVar(value=int(self.config.get('GUI', 'preview_lines', '20')))
         self.pretty_format = ""
+        self.preview_content = None
+        self.preview_rows = 0
+        self.memory_report = ""
+        # Виртуальный просмотр текста: в виджете только видимые строки начиная с _view_top
+        self._view_lines = None
+        self._view_top = 0
+
+        # Очередь задач: чтение и конвертация выполняются в пуле потоков, GUI остаётся доступным
+        self.jobs = JobManager(int(self.config.get('GUI', 'max_jobs', '2')))
+        self._load_job = None
+        self._preview_job = None
 
         # Настройка Drag & Drop только если доступно
         if DND_AVAILABLE:
@@ -455,6 +3759,10 @@ class DataConverterGUI:
             self.drag_drop_status = "Drag & Drop недоступен (установите tkinterdnd2)"
 
         self._build_gui()
+        self.master.protocol("WM_DELETE_WINDOW", self.on_close)
+        self.master.after(JOB_POLL_MS, self._poll_jobs)
+        # pandas и прочие тяжёлые модули импортируются в фоне, когда окно уже показано
+        self.master.after(PRELOAD_DELAY_MS, lambda: threading.Thread(target=preload_modules, daemon=True).start())
 
         # Логирование запуска
         self.logger.log_operation("APPLICATION_START", f"Converter v2.0 - {self.drag_drop_status}")
@@ -523,6 +3831,30 @@ class DataConverterGUI:
                                       command=self.convert, style="Accent.TButton")
         self.btn_convert.pack(side="left")
 
+        # Конвертация в несколько форматов за одно чтение
+        self.multi_formats = {fmt: BooleanVar(value=False) for fmt in SUPPORTED_FORMATS}
+        self.multi_button = ttk.Menubutton(row2, text="Форматы ▾")
+        multi_menu = Menu(self.multi_button, tearoff=0, bg=BG_ALT, fg=TXT_MAIN)
+        for fmt, var in self.multi_formats.items():
+            multi_menu.add_checkbutton(label=fmt, variable=var)
+        self.multi_button["menu"] = multi_menu
+        self.multi_button.pack(side="left", padx=(21,8))
+
+        self.btn_convert_multi = ttk.Button(row2, text="🗂 В отмеченные форматы",
+                                            command=self.convert_multi, style="Accent.TButton")
+        self.btn_convert_multi.pack(side="left")
+
+        # Третья строка - выборка столбцов и строк (пустые поля — весь файл)
+        row3 = Frame(control_frame, bg=BG_SEC)
+        row3.pack(fill="x", pady=(0,4))
+
+        Label(row3, text="Столбцы:", font=label_font, bg=BG_SEC, fg=TXT_ACCENT).pack(side="left")
+        ttk.Entry(row3, textvariable=self.select_columns, width=24).pack(side="left", padx=(8,16))
+        Label(row3, text="Условие:", font=label_font, bg=BG_SEC, fg=TXT_ACCENT).pack(side="left")
+        ttk.Entry(row3, textvariable=self.select_where, width=32).pack(side="left", padx=(8,16))
+        Label(row3, text="Лимит строк:", font=label_font, bg=BG_SEC, fg=TXT_ACCENT).pack(side="left")
+        ttk.Entry(row3, textvariable=self.select_limit, width=10).pack(side="left", padx=8)
+
         # Прогресс-бар
         self.progress = ttk.Progressbar(self.master, mode='indeterminate')
         self.progress.pack(fill="x", padx=19, pady=(0,7))
@@ -533,6 +3865,26 @@ class DataConverterGUI:
                                   font=label_font, anchor="w", padx=12, bg=BG_MAIN)
         self.status_label.pack(fill="x", pady=(0,7), padx=10)
 
+        # Панель очереди задач
+        style.configure("Jobs.Treeview", background=BG_ALT, fieldbackground=BG_ALT, foreground=TXT_MAIN)
+        jobs_frame = Frame(self.master, bg=BG_MAIN)
+        jobs_frame.pack(fill="x", padx=18, pady=(0,8))
+
+        columns = {"task": ("Задача", 220), "file": ("Файл", 260), "status": ("Статус", 110),
+                   "progress": ("Прогресс", 220), "time": ("Время", 70)}
+        self.jobs_tree = ttk.Treeview(jobs_frame, columns=list(columns), show="headings",
+                                      height=4, style="Jobs.Treeview")
+        for column, (title, width) in columns.items():
+            self.jobs_tree.heading(column, text=title)
+            self.jobs_tree.column(column, width=width, anchor="w")
+        self.jobs_tree.pack(side="left", fill="x", expand=True)
+
+        jobs_buttons = Frame(jobs_frame, bg=BG_MAIN)
+        jobs_buttons.pack(side="left", fill=Y, padx=(8,0))
+        ttk.Button(jobs_buttons, text="⏹ Отменить", command=self.cancel_jobs).pack(fill="x")
+        ttk.Button(jobs_buttons, text="↻ Повторить", command=self.retry_jobs).pack(fill="x", pady=4)
+        ttk.Button(jobs_buttons, text="Очистить", command=self.clear_jobs).pack(fill="x")
+
         # Панель предпросмотра
         preview_frame = Frame(self.master, bg=BG_MAIN)
         preview_frame.pack(fill="both", expand=True, padx=18, pady=(0,8))
@@ -558,18 +3910,22 @@ class DataConverterGUI:
         self.spin_preview.bind("<Return>", lambda e: self.update_preview())
 
         # Текстовая область с прокруткой
+        self.text_font = text_font
         self.text = Text(preview_frame, width=125, height=35, font=text_font,
                          bg=BG_ALT, relief="ridge", borderwidth=2, fg=TXT_MAIN,
                          insertbackground=TXT_MAIN, wrap="none")
 
-        yscroll = Scrollbar(preview_frame, orient=VERTICAL, command=self.text.yview,
-                            bg=BG_ALT, troughcolor=BG_MAIN)
+        self.yscroll = Scrollbar(preview_frame, orient=VERTICAL, command=self._preview_yview,
+                                 bg=BG_ALT, troughcolor=BG_MAIN)
         xscroll = Scrollbar(self.master, orient=HORIZONTAL, command=self.text.xview,
                             bg=BG_ALT, troughcolor=BG_MAIN)
 
-        self.text.configure(yscrollcommand=yscroll.set, xscrollcommand=xscroll.set)
+        self.text.configure(yscrollcommand=self._preview_yscroll, xscrollcommand=xscroll.set)
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.text.bind(sequence, self._preview_wheel)
+        self.text.bind("<Configure>", lambda e: self._view_lines is not None and self._render_view())
 
-        yscroll.pack(in_=preview_frame, side=RIGHT, fill=Y)
+        self.yscroll.pack(in_=preview_frame, side=RIGHT, fill=Y)
         xscroll.pack(side=BOTTOM, fill=X, padx=18, pady=(0,8))
         self.text.pack(in_=preview_frame, side="left", fill="both", expand=True)
 
@@ -581,6 +3937,7 @@ class DataConverterGUI:
         """Показать прогресс-бар"""
         if self.config.get('PROCESSING', 'show_progress', 'true') == 'true':
             self.progress.pack(fill="x", padx=19, pady=(0,7), before=self.status_label)
+            self.progress.configure(mode='indeterminate')
             self.progress.start(10)
 
     def hide_progress(self):
@@ -588,21 +3945,20 @@ class DataConverterGUI:
         self.progress.stop()
         self.progress.pack_forget()
 
-    def _set_ui_state(self, is_busy):
-        """Включает/выключает элементы GUI во время операций."""
-        state = "disabled" if is_busy else "normal"
-        self.btn_file.config(state=state)
-        self.btn_convert.config(state=state)
-        self.format_combo.config(state="readonly" if not is_busy else "disabled")
-        self.spin_preview.config(state=state)
-
-        if is_busy:
-            self.show_progress()
+    def _set_progress_fraction(self, fraction):
+        """Доля выполнения на прогресс-баре; None — объём неизвестен, бегущая полоса"""
+        if fraction is None:
+            if str(self.progress.cget('mode')) != 'indeterminate':
+                self.progress.configure(mode='indeterminate', value=0)
+                self.progress.start(10)
         else:
-            self.hide_progress()
+            if str(self.progress.cget('mode')) != 'determinate':
+                self.progress.stop()
+                self.progress.configure(mode='determinate', maximum=100)
+            self.progress.configure(value=fraction * 100)
 
     def process_file(self, path):
-        """Обработка выбранного файла"""
+        """Обработка выбранного файла: чтение начала файла ставится в очередь задач"""
         if not path:
             return
 
@@ -612,42 +3968,70 @@ class DataConverterGUI:
                 messagebox.showerror("Ошибка", "Файл недоступен для чтения!")
                 return
 
-            max_size = float(self.config.get('PROCESSING', 'max_file_size_mb', '100'))
-            is_valid, size_mb = self.validator.validate_file_size(path, max_size)
-            if not is_valid:
-                messagebox.showerror("Ошибка",
-                                     f"Файл слишком большой ({size_mb:.1f} МБ). Максимум: {max_size} МБ")
-                return
-
+        # Новый файл заменяет ещё не открытый предыдущий
+        if self._load_job:
+            self._load_job.cancel()
+        if self._preview_job:
+            self._preview_job.cancel()
+            self._preview_job = None
         self.file_path = path
+        self.in_format.set("")
+        self.data_content = None
+        self.preview_content = None
+        self._view_lines = None
+        self.memory_report = ""
         self.status.set(f"Чтение файла: {os.path.basename(path)}...")
-        self._set_ui_state(is_busy=True)
 
-        threading.Thread(target=self._load_file_thread, args=(path,), daemon=True).start()
+        n = self._preview_size()
+        self._load_job = self.jobs.submit(Job("Открытие", path, self._load_file_job, (n,), self._load_done))
 
-    def update_preview(self):
-        self.text.delete(1.0, END)
+    def _preview_size(self):
+        """Число строк предпросмотра; пустое или нечисловое поле сбрасывается к 20"""
         try:
-            n = max(1, self.n_preview.get())
+            return max(1, self.n_preview.get())
         except Exception:
-            n = 20
-            self.n_preview.set(n)
+            self.n_preview.set(20)
+            return 20
 
-        self.preview_label.config(text=f"Просмотр первых {n} строк:")
+    def update_preview(self):
+        self.text.delete(1.0, END)
+        n = self._preview_size()
+
+        memory = f"  ·  память: {self.memory_report}" if self.memory_report else ""
+        self.preview_label.config(text=f"Просмотр первых {n} строк:{memory}")
         self.preview_format_label.config(text=f" [{self.pretty_format}]" if self.pretty_format else "")
 
-        if self.data_content is None:
+        content = self.data_content if self.data_content is not None else self.preview_content
+        if isinstance(content, TextLines):
+            # Текст прокручивается по всему файлу: видимые строки читаются с диска по мере прокрутки
+            if self._view_lines is not content:
+                self._view_lines, self._view_top = content, 0
+            self._render_view()
+            return
+        self._view_lines = None
+
+        if self.data_content is None and self.preview_content is None:
             return
 
         try:
-            content = self.data_content
             fmt = self.in_format.get()
+            if self.data_content is not None:
+                content = self.data_content
+            else:
+                # Предпросмотр короче запрошенного — начало файла дочитывается в задаче, а пока
+                # показывается уже прочитанное
+                if n > self.preview_rows and len(self.preview_content) >= self.preview_rows:
+                    self._submit_preview(fmt, n)
+                content = self.preview_content
             preview = ""
 
             if fmt == "code" or isinstance(content, list):
                 preview = "".join(content[:n])
             elif isinstance(content, pd.DataFrame):
                 preview = content.head(n).to_markdown(index=False)
+            elif is_workbook(content):
+                preview = "\n\n".join(f"## {name}\n{df.head(n).to_markdown(index=False)}"
+                                      for name, df in content.items())
             elif isinstance(content, dict):
                 preview = json.dumps(content, ensure_ascii=False, indent=3)
             else:
@@ -657,6 +4041,87 @@ class DataConverterGUI:
         except Exception as e:
             self.text.insert(END, f"Ошибка обновления предпросмотра: {e}\n\n{traceback.format_exc()}")
 
+    def _submit_preview(self, fmt, n):
+        """Ставит в очередь чтение первых n строк; меньший запрос покрывается уже начатым."""
+        job = self._preview_job
+        if job and job.status not in JOB_FINISHED:
+            if job.args[1] >= n:
+                return
+            job.cancel()
+        self._preview_job = self.jobs.submit(Job("Предпросмотр", self.file_path, self._preview_file_job,
+                                                 (fmt, n, self._csv_profile()), self._preview_done))
+
+    @staticmethod
+    def _preview_file_job(job, fmt, n, csv_profile):
+        return read_preview(job.src, fmt, n, csv_profile)
+
+    def _preview_done(self, job):
+        """Итог дочитывания предпросмотра; результат для другого файла или уже загруженных данных не нужен"""
+        if job is self._preview_job:
+            self._preview_job = None
+        _, n, _ = job.args
+        if job.status == JOB_ERROR:
+            self.status.set(f"Ошибка предпросмотра: {job.error}")
+        elif (job.status == JOB_DONE and job.src == self.file_path and self.data_content is None
+              and self.preview_content is not None and n > self.preview_rows):
+            self.preview_content = job.result
+            self.preview_rows = n
+            self.update_preview()
+
+    def _view_page(self):
+        """Число строк, помещающихся в области просмотра"""
+        linespace = self.text_font.metrics("linespace")
+        height = self.text.winfo_height()
+        return max(1, height // linespace if height > 1 else int(self.text.cget("height")))
+
+    def _render_view(self):
+        """Показывает видимое окно строк текстового файла"""
+        lines, page = self._view_lines, self._view_page()
+        total = len(lines)
+        self._view_top = max(0, min(self._view_top, total - page))
+        top = self._view_top
+        try:
+            text = "".join(lines.lines(top, min(top + page, total)))
+        except OSError as e:
+            self._view_lines = None
+            self.text.delete(1.0, END)
+            self.text.insert(END, str(e))
+            self.status.set("Файл изменился после открытия.")
+            return
+        self.text.delete(1.0, END)
+        self.text.insert(END, text)
+        memory = f"  ·  память: {self.memory_report}" if self.memory_report else ""
+        self.preview_label.config(text=f"Строки {min(top + 1, total):,}–{min(top + page, total):,} "
+                                       f"из {total:,}:{memory}")
+
+    def _preview_yview(self, *args):
+        """Команда вертикальной полосы прокрутки; в виртуальном режиме сдвигает окно строк"""
+        if self._view_lines is None:
+            self.text.yview(*args)
+            return
+        page = self._view_page()
+        if args[0] == "moveto":
+            self._view_top = int(float(args[1]) * len(self._view_lines))
+        elif args[0] == "scroll":
+            self._view_top += int(args[1]) * (page if args[2] == "pages" else 1)
+        self._render_view()
+
+    def _preview_yscroll(self, first, last):
+        """Положение полосы прокрутки; в виртуальном режиме — по всему файлу, а не по виджету"""
+        if self._view_lines is None:
+            self.yscroll.set(first, last)
+            return
+        total = max(len(self._view_lines), 1)
+        self.yscroll.set(self._view_top / total, min(self._view_top + self._view_page(), total) / total)
+
+    def _preview_wheel(self, event):
+        if self._view_lines is None:
+            return None
+        step = -3 if event.num == 4 or event.delta > 0 else 3
+        self._view_top += step
+        self._render_view()
+        return "break"
+
     def choose_file(self):
         """Диалог выбора файла"""
         initial_dir = self.config.get('PATHS', 'last_directory', str(Path.home()))
@@ -665,7 +4130,7 @@ class DataConverterGUI:
             title="Выберите файл",
             initialdir=initial_dir,
             filetypes=[
-                ("Все поддерживаемые", "*.csv *.xlsx *.json *.xml *.yaml *.yml *.ini *.txt *.md *.py *.cpp *.c *.h *.java *.cs *.js *.ts *.go *.rb *.swift *.sh *.bat *.pl *.php *.rs *.scala *.kt *.dart"),
+                ("Все поддерживаемые", "*.csv *.xlsx *.json *.jsonl *.ndjson *.parquet *.feather *.arrow *.xml *.yaml *.yml *.ini *.txt *.md *.py *.cpp *.c *.h *.java *.cs *.js *.ts *.go *.rb *.swift *.sh *.bat *.pl *.php *.rs *.scala *.kt *.dart"),
                 ("Все файлы", "*.*")
             ]
         )
@@ -674,32 +4139,142 @@ class DataConverterGUI:
             self.config.set('PATHS', 'last_directory', os.path.dirname(path))
             self.process_file(path)
 
-    def _load_file_thread(self, path):
-        """Поток загрузки файла"""
-        try:
+    def _load_file_job(self, job, n):
+        """Задача загрузки предпросмотра: читается только начало файла"""
+        path = job.src
+        metrics = OperationMetrics("FILE_PREVIEW", path)
+        with metrics.stage("detect"):
             fmt = detect_format(path)
-            data = read_data(path, fmt)
+        # Кэш проверяется для форматов, которые иначе пришлось бы читать целиком
+        with metrics.stage("cache_lookup"):
+            cached = None
+            if self.cache and not is_streamable(fmt):
+                cached = self.cache.get(path, fmt, _read_options(fmt, self._selected_sheets(),
+                                                                 csv_profile=self._csv_profile()))
+        job.checkpoint()
+        if cached is None and fmt in TEXT_FORMATS:
+            # Текст открывается сразу целиком: строится только индекс строк, а просмотр прокручивает весь файл
+            with metrics.stage("parse", bytes_in=os.path.getsize(path)):
+                lines = read_data(path, fmt, progress=job.progress.read, cache=self.cache)
             self.logger.log_operation("FILE_READ", path)
-            self.master.after(0, self._finish_loading, fmt, data, path)
-        except Exception as e:
-            error_info = f"Ошибка чтения файла: {e}\n\n{traceback.format_exc()}"
-            self.logger.log_operation("FILE_READ", path, "ERROR", str(e))
-            self.master.after(0, self._operation_error, error_info)
-
-    def _finish_loading(self, fmt, data, path):
-        """Завершение загрузки файла"""
+            self.logger.log_metrics(metrics)
+            return fmt, lines, n, lines, ""
+        if cached is not None:
+            if self._optimize_enabled() and (isinstance(cached, pd.DataFrame) or is_workbook(cached)):
+                cached = self._optimize_loaded(cached, metrics)
+            self.logger.log_operation("FILE_READ_CACHED", path)
+            self.logger.log_metrics(metrics)
+            return fmt, cached, n, cached, metrics.memory_report()
+        with metrics.stage("preview", rows=n):
+            preview = read_preview(path, fmt, n, self._csv_profile())
+        self.logger.log_operation("FILE_PREVIEW", path)
+        self.logger.log_metrics(metrics)
+        return fmt, preview, n, None, ""
+
+    def _load_done(self, job):
+        """Итог задачи загрузки; устаревшие загрузки (открыт другой файл) игнорируются"""
+        if job is not self._load_job:
+            return
+        self._load_job = None
+        if job.status == JOB_DONE:
+            fmt, preview, n, data, self.memory_report = job.result
+            self._finish_loading(fmt, preview, job.src, n, data)
+        elif job.status == JOB_ERROR:
+            self.logger.log_operation("FILE_READ", job.src, "ERROR", job.error)
+            self._operation_error(f"Ошибка чтения файла: {job.error}\n\n{job.details}")
+        else:
+            self.status.set(f"Открытие отменено: {os.path.basename(job.src)}")
+
+    def _read_full(self, job, fmt, metrics, selection=None):
+        """Полная загрузка файла, отложенная до момента конвертации (вызывается в задаче)."""
+        path = job.src
+        with metrics.stage("parse", bytes_in=os.path.getsize(path)):
+            data = read_data(path, fmt, progress=job.progress.read, cache=self.cache,
+                             sheets=self._selected_sheets(), csv_profile=self._csv_profile(), selection=selection)
+        self.logger.log_operation("FILE_READ", path)
+        job.checkpoint()
+        return data
+
+    def _optimize_enabled(self):
+        return self.config.get('PROCESSING', 'optimize_dtypes', 'false') == 'true'
+
+    def _optimize_loaded(self, df, metrics):
+        """Сжатие типов столбцов после полной загрузки; итог по памяти выводится над панелью просмотра."""
+        with metrics.stage("optimize"):
+            before = frame_memory(df)
+            df = optimize_dtypes(df)
+        metrics.update(memory_before=before, memory_after=frame_memory(df))
+        return df
+
+    def _finish_metrics(self, metrics, out_paths):
+        """Сброс на диск (если включён), итоговые размеры и запись метрик в лог."""
+        if self.config.get('PROCESSING', 'fsync_output', 'false') == 'true':
+            with metrics.stage("flush"):
+                flush_to_disk(out_paths)
+        metrics.update(bytes_out=sum(os.path.getsize(p) for p in out_paths if os.path.exists(p)))
+        self.logger.log_metrics(metrics)
+        if self.config.get('GUI', 'show_metrics', 'true') == 'true':
+            return metrics.summary()
+        return ""
+
+    def _normalize_loaded(self, job, fmt, data, metrics, selection=None):
+        """Разбор (если данные ещё не загружены), приведение к таблице, выборка и оптимизация типов.
+
+        Возвращает (таблица, загруженные задачей данные или None) — последние GUI берёт для предпросмотра.
+        Прочитанное с выборкой не возвращается: это не весь файл.
+        """
+        loaded = data is None
+        if loaded:
+            data = self._read_full(job, fmt, metrics, selection)
+        with metrics.stage("normalize"):
+            df = ensure_dataframe(data)
+            if selection and not loaded:
+                # Уже загруженные данные отбираются в памяти
+                df = selection.apply(df)
+        if self._optimize_enabled() and (loaded or df is not data):
+            df = self._optimize_loaded(df, metrics)
+        rows, cols = frame_shape(df)
+        metrics.update(rows=rows, cols=cols)
+        if not loaded or selection:
+            return df, None
+        return df, df if isinstance(data, pd.DataFrame) or is_workbook(data) else data
+
+    def _selected_sheets(self):
+        return parse_sheet_list(self.config.get('PROCESSING', 'xlsx_sheets', ''))
+
+    def _csv_profile(self):
+        return csv_profile_from_config(self.config)
+
+    def _selection(self):
+        """Выборка из полей «Столбцы», «Условие» и «Лимит строк»; None, если поля пусты."""
+        limit = self.select_limit.get().strip()
+        if limit and not limit.isdigit():
+            raise ValueError(f"Лимит строк должен быть неотрицательным целым числом: {limit}")
+        selection = Selection(parse_column_list(self.select_columns.get()), self.select_where.get(),
+                              int(limit) if limit else None)
+        return selection or None
+
+    def _finish_loading(self, fmt, preview, path, n, data=None):
+        """Завершение загрузки предпросмотра"""
         self.data_content = data
+        self.preview_content = preview
+        self.preview_rows = n
         self.pretty_format = get_pretty_format(path, fmt)
         self.in_format.set(fmt)
 
         self.in_label.config(text=f"Исходный формат: {self.pretty_format}")
-        self.status.set(f"Файл загружен: {os.path.basename(path)} ({self.pretty_format})")
+        if isinstance(data, TextLines):
+            self.status.set(f"Файл открыт: {os.path.basename(path)} ({self.pretty_format}), строк: {len(data):,}")
+        elif data is not None:
+            self.status.set(f"Файл загружен из кэша: {os.path.basename(path)} ({self.pretty_format})")
+        else:
+            self.status.set(f"Файл открыт: {os.path.basename(path)} ({self.pretty_format}); "
+                            f"полная загрузка выполнится при конвертации")
 
         self.format_combo["values"] = ["txt", "md"] if fmt == "code" else SUPPORTED_FORMATS
         self.out_format.set('')
 
         self.update_preview()
-        self._set_ui_state(is_busy=False)
 
     def convert(self):
         """Начало процесса конвертации"""
@@ -717,6 +4292,12 @@ class DataConverterGUI:
             messagebox.showerror("Ошибка", "Исходный код можно сохранять только как .txt или .md!")
             return
 
+        try:
+            selection = self._selection()
+        except ValueError as e:
+            messagebox.showerror("Ошибка", str(e))
+            return
+
         # Диалог сохранения
         initial_dir = self.config.get('PATHS', 'last_directory', str(Path.home()))
 
@@ -735,87 +4316,497 @@ class DataConverterGUI:
                 messagebox.showerror("Ошибка", "Нет прав на запись в выбранную директорию!")
                 return
 
+        # Полная загрузка ограничена по размеру; потоковая конвертация — нет
+        needs_full_load = self.data_content is None and not is_streamable(current_fmt, target_fmt)
+        if needs_full_load and self.config.get('PROCESSING', 'enable_validation', 'true') == 'true':
+            max_size = float(self.config.get('PROCESSING', 'max_file_size_mb', '100'))
+            is_valid, size_mb = self.validator.validate_file_size(self.file_path, max_size)
+            if not is_valid:
+                messagebox.showerror("Ошибка",
+                                     f"Файл слишком большой ({size_mb:.1f} МБ). Максимум: {max_size} МБ")
+                return
+
         self.config.set('PATHS', 'last_directory', os.path.dirname(save_path))
-        self.status.set(f"Конвертация в {target_fmt}...")
-        self._set_ui_state(is_busy=True)
+        self._submit_conversion("FILE_SAVE", [(save_path, target_fmt)], selection)
+
+    def _submit_conversion(self, operation, targets, selection=None):
+        """Ставит конвертацию текущего файла в очередь; уже загруженные данные передаются задаче"""
+        fmt = self.in_format.get()
+        title = f"Конвертация в {', '.join(out_fmt for _, out_fmt in targets)}"
+        self.jobs.submit(Job(title, self.file_path, self._conversion_job,
+                             (operation, fmt, self.data_content, targets, selection), self._conversion_done))
+        self.status.set(f"{title}: {os.path.basename(self.file_path)} — в очереди")
+
+    def _conversion_job(self, job, operation, fmt, data, targets, selection=None):
+        """Задача конвертации в один или несколько форматов: файл читается один раз"""
+        src = job.src
+        metrics = OperationMetrics(operation, targets[0][0] if operation == "FILE_SAVE" else src)
+        metrics.update(source=src, format=fmt, targets=[out_fmt for _, out_fmt in targets])
+        loaded = None
+        if fmt == "code":
+            content = data if data is not None else self._read_full(job, fmt, metrics)
+            loaded = content if data is None else None
+            results = []
+            with metrics.stage("write"):
+                for out_path, out_fmt in targets:
+                    save_code(content, out_path)
+                    results.append((out_path, out_fmt, None))
+        elif data is None and len(targets) == 1 and is_streamable(fmt, targets[0][1]):
+            save_path, target_fmt = targets[0]
+            chunksize = int(self.config.get('PROCESSING', 'chunk_size', '50000'))
+            try:
+                stream_convert(src, fmt, save_path, target_fmt, chunksize, metrics, progress=job.progress,
+                               csv_profile=self._csv_profile(), selection=selection)
+            except JobCancelled:
+                self._discard_outputs(targets)
+                raise
+            results = [(save_path, target_fmt, None)]
+        else:
+            df, loaded = self._normalize_loaded(job, fmt, data, metrics, selection)
+            job.checkpoint()
+            try:
+                with metrics.stage("write"):
+                    if operation == "FILE_SAVE":
+                        save_path, target_fmt = targets[0]
+                        save_data(df, save_path, target_fmt, progress=job.progress.write)
+                        results = [(save_path, target_fmt, None)]
+                    else:
+                        results = save_data_multi(df, targets, progress=job.progress.write)
+                # save_data_multi возвращает отмену как ошибку отдельного файла
+                job.checkpoint()
+            except JobCancelled:
+                self._discard_outputs(targets)
+                raise
+
+        for out_path, _, err in results:
+            if err:
+                self.logger.log_operation("FILE_SAVE", out_path, "ERROR", str(err))
+            else:
+                self.logger.log_operation("FILE_SAVE", out_path)
+        summary = self._finish_metrics(metrics, [p for p, _, err in results if not err])
+        return results, summary, loaded, metrics.memory_report()
 
-        threading.Thread(target=self._save_file_thread, args=(save_path, target_fmt), daemon=True).start()
+    @staticmethod
+    def _discard_outputs(targets):
+        """Удаляет недописанные файлы отменённой конвертации"""
+        for out_path, _ in targets:
+            if os.path.exists(out_path):
+                os.remove(out_path)
+
+    def _conversion_done(self, job):
+        """Итог задачи конвертации (вызывается в главном потоке при опросе очереди)"""
+        operation, fmt, _, targets, selection = job.args
+        # Снимок данных больше не нужен: повтор задачи перечитает файл
+        job.args = (operation, fmt, None, targets, selection)
+        if job.status == JOB_ERROR:
+            self.logger.log_operation("FILE_SAVE", job.src, "ERROR", job.error)
+            self._operation_error(f"Ошибка конвертации: {job.error}\n\n{job.details}")
+            return
+        if job.status == JOB_CANCELLED:
+            self.logger.log_operation("FILE_SAVE", job.src, "CANCELLED")
+            self.status.set(f"{job.title}: {os.path.basename(job.src)} — отменено")
+            return
+        results, summary, loaded, memory_report = job.result
+        # Загруженные задачей данные подхватываются, если этот файл всё ещё открыт
+        if loaded is not None and job.src == self.file_path and self.data_content is None and not self._load_job:
+            self.data_content = loaded
+            self.memory_report = memory_report
+            self.update_preview()
+        if operation == "FILE_SAVE":
+            self._finish_saving(results[0][0], summary)
+        else:
+            self._finish_saving_multi(results, summary)
+
+    def convert_multi(self):
+        """Конвертация в несколько отмеченных форматов: файл читается один раз"""
+        if not self.file_path or not self.in_format.get():
+            messagebox.showerror("Ошибка", "Сначала выберите и загрузите файл!")
+            return
+
+        formats = [fmt for fmt, var in self.multi_formats.items() if var.get()]
+        if not formats:
+            messagebox.showerror("Ошибка", "Отметьте хотя бы один формат в меню «Форматы»!")
+            return
+
+        current_fmt = self.in_format.get()
+        if current_fmt == "code" and any(fmt not in ["txt", "md"] for fmt in formats):
+            messagebox.showerror("Ошибка", "Исходный код можно сохранять только как .txt или .md!")
+            return
 
-    def _save_file_thread(self, save_path, target_fmt):
-        """Поток сохранения файла"""
         try:
-            current_fmt = self.in_format.get()
-            if current_fmt == "code":
-                save_code(self.data_content, save_path)
-            else:
-                df = self.data_content
-                if not isinstance(df, pd.DataFrame):
-                    df = _normalize_data_to_df(df)
-                    if not isinstance(df, pd.DataFrame):
-                        raise TypeError("Не удалось привести структуру данных к табличному виду для сохранения.")
-                save_data(df, save_path, target_fmt)
-
-            self.logger.log_operation("FILE_SAVE", save_path)
-            self.master.after(0, self._finish_saving, save_path)
-        except Exception as e:
-            error_info = f"Ошибка конвертации: {e}\n\n{traceback.format_exc()}"
-            self.logger.log_operation("FILE_SAVE", save_path, "ERROR", str(e))
-            self.master.after(0, self._operation_error, error_info)
+            selection = self._selection()
+        except ValueError as e:
+            messagebox.showerror("Ошибка", str(e))
+            return
 
-    def _finish_saving(self, save_path):
+        initial_dir = self.config.get('PATHS', 'last_directory', str(Path.home()))
+        out_dir = filedialog.askdirectory(title="Каталог для сохранения", initialdir=initial_dir)
+        if not out_dir:
+            return
+
+        if self.config.get('PROCESSING', 'enable_validation', 'true') == 'true':
+            if not os.access(out_dir, os.W_OK):
+                messagebox.showerror("Ошибка", "Нет прав на запись в выбранную директорию!")
+                return
+            if self.data_content is None:
+                max_size = float(self.config.get('PROCESSING', 'max_file_size_mb', '100'))
+                is_valid, size_mb = self.validator.validate_file_size(self.file_path, max_size)
+                if not is_valid:
+                    messagebox.showerror("Ошибка",
+                                         f"Файл слишком большой ({size_mb:.1f} МБ). Максимум: {max_size} МБ")
+                    return
+
+        stem = Path(self.file_path).stem
+        targets = [(os.path.join(out_dir, f"{stem}.{fmt}"), fmt) for fmt in formats]
+
+        self.config.set('PATHS', 'last_directory', out_dir)
+        self._submit_conversion("FILE_SAVE_MULTI", targets, selection)
+
+    def _finish_saving_multi(self, results, summary=""):
+        """Завершение сохранения в несколько форматов"""
+        saved = [out_path for out_path, _, err in results if not err]
+        failed = [f"{out_fmt}: {err}" for _, out_fmt, err in results if err]
+        self.status.set(f"Сохранено файлов: {len(saved)} из {len(results)}" + (f" ({summary})" if summary else ""))
+        self.text.insert(END, "\n\n" + "".join(f"--- Успешно сохранено в: {p} ---\n" for p in saved))
+        if failed:
+            messagebox.showerror("Ошибка", "Не удалось сохранить:\n" + "\n".join(failed))
+
+    def _finish_saving(self, save_path, summary=""):
         """Завершение сохранения"""
-        self.status.set(f"Успех! Сохранено в {os.path.basename(save_path)}")
+        self.status.set(f"Успех! Сохранено в {os.path.basename(save_path)}" + (f" ({summary})" if summary else ""))
         self.text.insert(END, f"\n\n--- Успешно сохранено в: {save_path} ---\n")
-        self._set_ui_state(is_busy=False)
-        messagebox.showinfo("Успех", f"Файл успешно сохранен по пути:\n{save_path}")
 
     def _operation_error(self, error_info):
         """Обработка ошибок операций"""
         self.status.set("Произошла ошибка.")
         self.text.delete(1.0, END)
         self.text.insert(END, error_info)
-        self._set_ui_state(is_busy=False)
         messagebox.showerror("Ошибка", error_info)
 
-# --- Точка входа ---
-if __name__ == "__main__":
-    # Проверка зависимостей
-    missing_packages = []
-    try:
-        import pandas
-    except ImportError:
-        missing_packages.append("pandas")
+    def _poll_jobs(self):
+        """Опрос очереди задач из главного потока: итоги задач, таблица очереди, прогресс-бар"""
+        self.master.after(JOB_POLL_MS, self._poll_jobs)
+        for job in self.jobs.poll():
+            if job.on_done:
+                job.on_done(job)
+            job.result = None  # результат передан в on_done; данные не держатся в очереди
+
+        for job in self.jobs.jobs.values():
+            values = (job.title, os.path.basename(job.src),
+                      "Отмена..." if job.cancelled and job.status not in JOB_FINISHED else JOB_STATUS_LABELS[job.status],
+                      job.error or job.progress.text(), f"{job.elapsed():.1f} с")
+            iid = str(job.id)
+            if self.jobs_tree.exists(iid):
+                self.jobs_tree.item(iid, values=values)
+            else:
+                self.jobs_tree.insert("", END, iid=iid, values=values)
+        for iid in self.jobs_tree.get_children():
+            if int(iid) not in self.jobs.jobs:
+                self.jobs_tree.delete(iid)
 
-    try:
-        import yaml
-    except ImportError:
-        missing_packages.append("pyyaml")
+        busy = self.jobs.active() > 0
+        if busy and not self.progress.winfo_ismapped():
+            self.show_progress()
+        elif not busy and self.progress.winfo_ismapped():
+            self.hide_progress()
 
+        # Строка статуса и прогресс-бар показывают первую выполняющуюся задачу
+        running = next((job for job in self.jobs.jobs.values() if job.status == JOB_RUNNING), None)
+        if running:
+            text = running.progress.text()
+            self.status.set(f"{running.title}: {os.path.basename(running.src)}" + (f" — {text}" if text else ""))
+            if self.progress.winfo_ismapped():
+                self._set_progress_fraction(running.progress.fraction)
+
+    def cancel_jobs(self):
+        """Отменить выбранные в очереди задачи"""
+        for iid in self.jobs_tree.selection():
+            self.jobs.cancel(int(iid))
+
+    def retry_jobs(self):
+        """Повторить выбранные задачи, завершившиеся ошибкой или отменённые"""
+        for iid in self.jobs_tree.selection():
+            job = self.jobs.jobs.get(int(iid))
+            if not job or job.status not in (JOB_ERROR, JOB_CANCELLED):
+                continue
+            if job.on_done == self._load_done:
+                self.process_file(job.src)
+            else:
+                self.jobs.retry(job.id)
+
+    def clear_jobs(self):
+        """Убрать завершённые задачи из очереди"""
+        self.jobs.clear_finished()
+
+    def on_close(self):
+        self.jobs.shutdown()
+        self.master.destroy()
+
+# --- Командная строка ---
+def parse_format_list(value):
+    """Разбирает список форматов вида "csv,json,xlsx" для аргумента --to."""
+    formats = list(dict.fromkeys(f.strip().lower() for f in value.split(",") if f.strip()))
+    unknown = [f for f in formats if f not in SUPPORTED_FORMATS]
+    if not formats or unknown:
+        raise argparse.ArgumentTypeError(
+            f"неизвестный формат: {', '.join(unknown) or value}; доступны: {', '.join(SUPPORTED_FORMATS)}")
+    return formats
+
+def build_arg_parser():
+    parser = argparse.ArgumentParser(prog="FFConverter.py",
+                                     description="Универсальный конвертер данных v2.0 (без GUI)")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Вывести в stderr время этапов запуска и отложенных импортов")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    convert_parser = subparsers.add_parser("convert", help="Пакетная конвертация файлов и каталогов")
+    convert_parser.add_argument("--to", dest="out_formats", required=True, type=parse_format_list,
+                                help="Целевой формат или несколько через запятую: csv,json,xlsx")
+    convert_parser.add_argument("--jobs", "-j", type=int, default=None,
+                                help="Число рабочих процессов (по умолчанию — число ядер)")
+    convert_parser.add_argument("--recursive", "-r", action="store_true",
+                                help="Обходить подкаталоги")
+    convert_parser.add_argument("--pattern", default=None,
+                                help="Шаблон имён файлов, например *.csv")
+    convert_parser.add_argument("--chunksize", type=int, default=None,
+                                help="Размер чанка для потоковой конвертации (0 — читать файлы целиком)")
+    convert_parser.add_argument("--no-cache", action="store_true",
+                                help="Не использовать кэш результатов разбора (по умолчанию он включён: "
+                                     f"каталог {user_cache_dir() / 'cache'}, не больше disk_budget_mb "
+                                     "из [CACHE], по умолчанию 2048 МБ)")
+    convert_parser.add_argument("--incremental", "-i", action="store_true",
+                                help="Пропускать файлы, не изменившиеся с прошлого запуска")
+    convert_parser.add_argument("--manifest", default=None,
+                                help=f"Файл манифеста (по умолчанию {MANIFEST_NAME} в каталоге результатов)")
+    convert_parser.add_argument("--sheets", type=parse_sheet_list, default=None,
+                                help="Листы XLSX через запятую или * для всех (по умолчанию — первый лист)")
+    convert_parser.add_argument("--optimize", action="store_true",
+                                help="Сжимать типы столбцов в памяти (при чтении файла целиком)")
+    convert_parser.add_argument("--no-progress", action="store_true",
+                                help="Не выводить прогресс и оценку оставшегося времени (по умолчанию выводятся в терминал)")
+    convert_parser.add_argument("--csv-engine", choices=CSV_ENGINES, default=None,
+                                help="Движок чтения CSV (по умолчанию из [CSV] settings.ini; pyarrow — многопоточный)")
+    convert_parser.add_argument("--csv-encoding", default=None,
+                                help="Кодировка CSV, например cp1251 (auto — определить по началу файла)")
+    convert_parser.add_argument("--csv-delimiter", default=None,
+                                help="Разделитель CSV: , ; | tab (auto — определить по началу файла)")
+    convert_parser.add_argument("--csv-usecols", type=parse_column_list, default=None,
+                                help="Читать из CSV только эти столбцы: id,name,price")
+    convert_parser.add_argument("--csv-dtype", type=parse_dtype_map, default=None,
+                                help="Типы столбцов CSV: id:int64,code:str")
+    convert_parser.add_argument("--columns", type=parse_column_list, default=None,
+                                help="Выходные столбцы в нужном порядке: id,name,price (по умолчанию — все)")
+    convert_parser.add_argument("--where", default=None,
+                                help="Условие отбора строк в синтаксисе DataFrame.query: \"price > 100 and region == 'EU'\"")
+    convert_parser.add_argument("--limit", type=int, default=None,
+                                help="Не больше стольких строк из каждого файла (листа XLSX)")
+    convert_parser.add_argument("sources", nargs="+", help="Исходные файлы или каталоги")
+    convert_parser.add_argument("output", help="Каталог для результатов")
+
+    bench_parser = subparsers.add_parser("bench", help="Бенчмарк всех пар форматов чтение→запись")
+    bench_parser.add_argument("--rows", type=int, default=10000, help="Число строк синтетических данных")
+    bench_parser.add_argument("--cols", type=int, default=10, help="Число столбцов")
+    bench_parser.add_argument("--dtypes", type=lambda v: [d.strip() for d in v.split(",") if d.strip()],
+                              default=None, help=f"Типы столбцов через запятую: {','.join(BENCH_DTYPES)}")
+    bench_parser.add_argument("--inputs", type=parse_format_list, default=None,
+                              help="Входные форматы через запятую (по умолчанию все)")
+    bench_parser.add_argument("--outputs", type=parse_format_list, default=None,
+                              help="Выходные форматы через запятую (по умолчанию все)")
+    bench_parser.add_argument("--repeat", type=int, default=1, help="Повторов на пару (берётся лучший)")
+    bench_parser.add_argument("--workdir", default=None, help="Каталог для временных файлов")
+    bench_parser.add_argument("--json", dest="json_path", default=None, help="Сохранить отчёт в JSON")
+    bench_parser.add_argument("--compare", default=None, help="Сравнить с предыдущим JSON-отчётом")
+
+    watch_parser = subparsers.add_parser("watch", help="Наблюдать за каталогами из правил [WATCH:*] в settings.ini")
+    watch_parser.add_argument("--jobs", "-j", type=int, default=None,
+                              help="Число рабочих процессов (по умолчанию из [WATCH] jobs или число ядер)")
+    watch_parser.add_argument("--poll", action="store_true", help="Периодический обход вместо inotify")
+    watch_parser.add_argument("--once", action="store_true",
+                              help="Обработать найденные файлы и завершиться")
+    return parser
+
+def _cli_convert(args, config, logger):
     try:
-        import openpyxl
-    except ImportError:
-        missing_packages.append("openpyxl")
-
+        tasks = collect_batch_files(args.sources, args.output, args.out_formats,
+                                    args.recursive, args.pattern)
+    except FileNotFoundError as e:
+        print(e, file=sys.stderr)
+        return 2
+    if not tasks:
+        print("Нет файлов для конвертации.")
+        return 0
+    chunksize = args.chunksize
+    if chunksize is None:
+        chunksize = int(config.get('PROCESSING', 'chunk_size', '50000'))
+    fsync = config.get('PROCESSING', 'fsync_output', 'false') == 'true'
+    sheets = args.sheets if args.sheets is not None else parse_sheet_list(config.get('PROCESSING', 'xlsx_sheets', ''))
+    optimize = args.optimize or config.get('PROCESSING', 'optimize_dtypes', 'false') == 'true'
     try:
-        import tabulate
-    except ImportError:
-        missing_packages.append("tabulate")
-
+        csv_profile = csv_profile_from_config(config, engine=args.csv_engine, encoding=args.csv_encoding,
+                                              delimiter=args.csv_delimiter, usecols=args.csv_usecols,
+                                              dtype=args.csv_dtype)
+        selection = Selection(args.columns, args.where, args.limit) or None
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    manifest = None
+    if args.incremental:
+        # Параметры, от которых зависит содержимое результата
+        def options_for(fmt):
+            options = {"format": fmt, "sheets": sheets, "optimize": optimize, "csv": csv_profile}
+            if selection:
+                options["selection"] = selection.to_dict()
+            return options
+        manifest = ConversionManifest(args.manifest or Path(args.output) / MANIFEST_NAME)
+        tasks, skipped = manifest.filter_tasks(tasks, options_for)
+        print(f"Без изменений, пропущено результатов: {skipped}")
+        if not tasks:
+            manifest.save()  # сохраняет обновлённые mtime файлов, сверенных по хэшу
+            return 0
+
+    results = run_batch(tasks, args.jobs, logger, chunksize=chunksize,
+                        cache_settings=_worker_cache_settings(config, args.no_cache), fsync=fsync, sheets=sheets,
+                        optimize=optimize, progress=not args.no_progress and sys.stderr.isatty(),
+                        csv_profile=csv_profile, selection=selection)
+    if manifest:
+        manifest.record(results, tasks, options_for)
+        manifest.save()
+    return 0 if all(r["status"] == "SUCCESS" for r in results) else 1
+
+def _worker_cache_settings(config, disabled=False):
+    if disabled or config.get('CACHE', 'enabled', 'true') != 'true':
+        return None
+    # В рабочих процессах кэш только дисковый: память каждого процесса не раздувается
+    return {
+        "directory": config.get('CACHE', 'directory', 'cache'),
+        "memory_budget_mb": 0,
+        "disk_budget_mb": float(config.get('CACHE', 'disk_budget_mb', '2048')),
+        "hash_content": config.get('CACHE', 'hash_content', 'true') == 'true',
+    }
+
+def _cli_watch(args, config, logger):
     try:
-        import lxml
-    except ImportError:
-        missing_packages.append("lxml")
+        rules = load_watch_rules(config)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    if not rules:
+        print("Нет правил наблюдения: добавьте в settings.ini секцию [WATCH:имя] с ключами "
+              "input, output и formats.", file=sys.stderr)
+        return 2
+    missing = [str(rule.input_dir) for rule in rules if not rule.input_dir.is_dir()]
+    if missing:
+        print(f"Каталоги для наблюдения не найдены: {', '.join(missing)}", file=sys.stderr)
+        return 2
+
+    jobs = args.jobs or int(config.get('WATCH', 'jobs', '') or 0) or None
+    ignore = [mask.strip() for mask in config.get('WATCH', 'ignore', '').split(",") if mask.strip()]
+    chunksize = int(config.get('PROCESSING', 'chunk_size', '50000'))
+    try:
+        csv_profile = csv_profile_from_config(config)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    # Позиционные аргументы convert_file после targets; прогресс в режиме наблюдения не выводится
+    convert_args = (chunksize, _worker_cache_settings(config),
+                    config.get('PROCESSING', 'fsync_output', 'false') == 'true',
+                    parse_sheet_list(config.get('PROCESSING', 'xlsx_sheets', '')),
+                    config.get('PROCESSING', 'optimize_dtypes', 'false') == 'true',
+                    False, csv_profile)
+    watcher = FolderWatcher(
+        rules, ConversionJournal(config.get('WATCH', 'journal', 'watch_journal.jsonl')), logger,
+        jobs=jobs,
+        debounce=float(config.get('WATCH', 'debounce_seconds', '2')),
+        poll_interval=float(config.get('WATCH', 'poll_interval', '1')),
+        ignore=ignore,
+        use_inotify=not args.poll and config.get('WATCH', 'use_inotify', 'true') == 'true',
+        convert_args=convert_args,
+    )
+    for rule in rules:
+        print(f"Наблюдение [{rule.name}]: {rule.input_dir} ({rule.pattern}) -> {rule.output_dir} "
+              f"[{', '.join(rule.formats)}]")
+    try:
+        watcher.run(once=args.once)
+    except KeyboardInterrupt:
+        print("Наблюдение остановлено.")
+    return 0
+
+def _cli_bench(args):
+    unknown = [d for d in args.dtypes or [] if d not in BENCH_DTYPES]
+    if unknown:
+        print(f"Неизвестные типы столбцов: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    report = run_benchmark(args.rows, args.cols, args.dtypes, args.inputs, args.outputs,
+                           args.repeat, args.workdir)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"Отчёт сохранён: {args.json_path}")
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            previous = json.load(f)
+        print("Сравнение с предыдущим запуском:")
+        for line in compare_benchmarks(previous, report):
+            print(line)
+    return 0 if all("error" not in r for r in report["results"]) else 1
+
+def run_cli(argv):
+    """Точка входа режима командной строки; возвращает код завершения."""
+    args = build_arg_parser().parse_args(argv)
+
+    if args.command == "convert":
+        return _cli_convert(args, AppConfig(), AppLogger())
+    if args.command == "bench":
+        return _cli_bench(args)
+    if args.command == "watch":
+        return _cli_watch(args, AppConfig(), AppLogger())
+    return 2
 
-    # Определяем класс root в зависимости от доступности tkinterdnd2
-    if DND_AVAILABLE:
-        root_class = TkinterDnD.Tk
-    else:
-        root_class = Tk
+# --- Точка входа ---
+# Обязательные модули и пакеты pip, которые их устанавливают
+REQUIRED_PACKAGES = {"pandas": "pandas", "yaml": "pyyaml", "openpyxl": "openpyxl",
+                     "tabulate": "tabulate", "lxml": "lxml"}
+
+def missing_dependencies():
+    """Пакеты pip, которых нет в окружении; проверяется только наличие модуля, без импорта."""
+    return [package for module, package in REQUIRED_PACKAGES.items()
+            if importlib.util.find_spec(module) is None]
+
+def startup_profile_report():
+    """Строки отчёта --profile-startup: этапы запуска и отложенные импорты в миллисекундах.
+
+    Этапы измеряются по часам (wall) от начала загрузки модуля; процессорное время (CPU)
+    выводится отдельно и с ним не складывается.
+    """
+    lines = ["Профиль запуска, мс (по часам):"]
+    for name, seconds in STARTUP_STAGES:
+        lines.append(f"  {name:<44}{seconds * 1000:9.1f}")
+    lines.append(f"  {'всего с начала загрузки модуля':<44}{(time.perf_counter() - _STARTUP_STARTED) * 1000:9.1f}")
+    lines.append("Процессорное время, мс:")
+    lines.append(f"  {'запуск интерпретатора':<44}{_STARTUP_CPU * 1000:9.1f}")
+    lines.append(f"  {'всего':<44}{time.process_time() * 1000:9.1f}")
+    return lines
+
+STARTUP_STAGES.append(("определения модуля", time.perf_counter() - _STARTUP_STARTED - STARTUP_STAGES[0][1]))
+
+if __name__ == "__main__":
+    # Флаг профилирования допустим в любом месте командной строки и в режиме GUI
+    profile_startup = "--profile-startup" in sys.argv[1:]
+    argv = [arg for arg in sys.argv[1:] if arg != "--profile-startup"]
+
+    # Проверка зависимостей
+    started = time.perf_counter()
+    missing_packages = missing_dependencies()
+    STARTUP_STAGES.append(("проверка зависимостей", time.perf_counter() - started))
 
     if missing_packages:
         message = f"Необходима установка библиотек: {', '.join(missing_packages)}\nИспользуйте: pip install {' '.join(missing_packages)}"
         print(message)
+        if argv:
+            sys.exit(1)
         try:
+            load_tkinter()
             root = Tk()
             root.withdraw()
             messagebox.showerror("Критическая ошибка", message)
@@ -823,7 +4814,20 @@ if __name__ == "__main__":
             pass
         sys.exit(1)
 
-    # Запуск приложения
+    # Режим командной строки
+    if argv:
+        if profile_startup:
+            atexit.register(lambda: print("\n".join(startup_profile_report()), file=sys.stderr))
+        sys.exit(run_cli(argv))
+
+    # Запуск приложения: окно строится до импорта pandas, тяжёлые модули догружаются в фоне
+    load_tkinter()
+    # Определяем класс root в зависимости от доступности tkinterdnd2
+    root_class = TkinterDnD.Tk if DND_AVAILABLE else Tk
+    started = time.perf_counter()
     root = root_class()
     app = DataConverterGUI(root)
+    STARTUP_STAGES.append(("построение окна", time.perf_counter() - started))
+    if profile_startup:
+        root.after_idle(lambda: print("\n".join(startup_profile_report()), file=sys.stderr))
     root.mainloop()
@@ -0,0 +1,25 @@
+import json
+
+import pytest
+
+import FFConverter as ffc
+
+
+@pytest.mark.parametrize("values", [
+    [1.5, 2.25, -3.125, 10.0, 0.5] * 40,
+    [1.5e3, -2.5E-7, 6e+10, 7.0e1] * 40,
+    [1, 22, 333, 4444, 55555] * 40,
+])
+@pytest.mark.parametrize("buffer_size", [1, 2, 3, 5, 7, 16])
+def test_iter_json_array_numbers_across_buffer_boundaries(tmp_path, values, buffer_size):
+    path = tmp_path / "numbers.json"
+    path.write_text(json.dumps(values), encoding="utf-8")
+    assert list(ffc._iter_json_array(str(path), buffer_size=buffer_size)) == values
+
+
+@pytest.mark.parametrize("text", ["[1.5e3]", "[ 1.5 , 2e-3 ]\n", "[true,null,\"a\",{\"b\":1.25},[2.5]]"])
+def test_iter_json_array_small_documents(tmp_path, text):
+    path = tmp_path / "small.json"
+    path.write_text(text, encoding="utf-8")
+    for buffer_size in range(1, len(text) + 1):
+        assert list(ffc._iter_json_array(str(path), buffer_size=buffer_size)) == json.loads(text)
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+import tabulate
+
+import FFConverter as ffc
+
+
+def _frames():
+    n = ffc.TEXT_TABLE_BLOCK_ROWS + 2500
+    rng = np.random.default_rng(0)
+    numeric = pd.DataFrame({
+        "id": np.arange(n),
+        "value": rng.normal(size=n) * 1e3,
+        "ratio": rng.random(n),
+    })
+    mixed = numeric.assign(
+        name=[f"row {i}" if i % 7 else "ширина" for i in range(n)],
+        flag=np.arange(n) % 3 == 0,
+        maybe=[None if i % 11 == 0 else i * 0.5 for i in range(n)],
+    )
+    return [numeric, mixed]
+
+
+@pytest.mark.parametrize("df", _frames())
+def test_write_md_matches_to_markdown(tmp_path, df):
+    path = tmp_path / "table.md"
+    ffc._write_md(df, str(path))
+    assert path.read_text(encoding="utf-8") == df.to_markdown(index=False)
+
+
+def test_write_md_falls_back_for_unverified_tabulate(tmp_path, monkeypatch):
+    df = _frames()[1]
+    monkeypatch.setattr(tabulate, "__version__", "99.0.0")
+    path = tmp_path / "table.md"
+    ffc._write_md(df, str(path))
+    assert path.read_text(encoding="utf-8") == df.to_markdown(index=False)
+
+
+def test_write_md_falls_back_when_internals_change(tmp_path, monkeypatch):
+    df = _frames()[1]
+
+    def _format(*args):
+        raise TypeError("changed signature")
+
+    monkeypatch.setattr(tabulate, "_format", _format)
+    path = tmp_path / "table.md"
+    ffc._write_md(df, str(path))
+    monkeypatch.undo()
+    assert path.read_text(encoding="utf-8") == df.to_markdown(index=False)